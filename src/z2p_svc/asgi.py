@@ -115,6 +115,11 @@ async def shutdown_services() -> None:
     except Exception as e:
         logger.error("停止FE版本后台更新失败: error={}", str(e))
 
+    # 关闭共享 HTTP 会话，释放上游连接池
+    from .utils.http_session import close_shared_sessions
+
+    await close_shared_sessions()
+
     logger.info("Application services shut down successfully")
     _initialized = False
 
@@ -11,7 +11,7 @@ from typing import Any, AsyncGenerator
 
 from .config import get_settings
 from .file_uploader import FileUploader
-from .logger import get_logger, json_str
+from .logger import get_logger, is_level_enabled, json_str
 from .models import (
     ChatRequest,
     ModelFeatures,
@@ -176,11 +176,15 @@ async def prepare_request_data(
     )
     
     # 预加载模型映射表以支持动态模型ID转换
-    from .model_service import get_models, get_upstream_models_cache
+    from .model_service import get_models, get_models_cache, get_upstream_models_cache
     models = []  # 初始化 models 变量（下游模型列表）
     upstream_models = []  # 上游模型列表（包含完整的 meta 信息）
     try:
-        models_data = await get_models(access_token=access_token, use_cache=True)
+        # 路由层校验模型时已加载模型列表，直接复用缓存；过期刷新由路由层在后台完成，
+        # 仅在缓存尚未加载时才等待 get_models
+        models_data = get_models_cache()
+        if models_data is None:
+            models_data = await get_models(access_token=access_token, use_cache=True)
         models = models_data.get("data", [])
         
         # 从缓存获取上游模型信息（避免重复请求）
@@ -647,21 +651,22 @@ async def prepare_request_data(
 
     files_processed = bool(converted.file_urls)
     
-    # info 等级：输出关键摘要信息
-    logger.info(
-        "Request prepared: chat_id={}, request_id={}, model={}, upstream_model={}, streaming={}, messages={}, files={}, features={}",
-        zai_data.chat_id,
-        params.requestId,
-        chat_request.model,
-        zai_data.model,
-        streaming,
-        len(zai_data.messages),
-        len(zai_data.files) if zai_data.files else 0,
-        json_str(list(zai_data.features.keys()) if zai_data.features else [])
-    )
+    # info 等级：输出关键摘要信息；参数含 JSON 序列化，级别关闭时整体跳过
+    if is_level_enabled("INFO"):
+        logger.info(
+            "Request prepared: chat_id={}, request_id={}, model={}, upstream_model={}, streaming={}, messages={}, files={}, features={}",
+            zai_data.chat_id,
+            params.requestId,
+            chat_request.model,
+            zai_data.model,
+            streaming,
+            len(zai_data.messages),
+            len(zai_data.files) if zai_data.files else 0,
+            json_str(list(zai_data.features.keys()) if zai_data.features else [])
+        )
     
-    # debug 等级：输出完整数据（用于调试）
-    if settings.verbose_logging:
+    # debug 等级：输出完整数据（用于调试）；仅在 DEBUG 日志实际输出时才序列化
+    if settings.verbose_logging and is_level_enabled("DEBUG"):
         zai_data_dict = zai_data.model_dump()
         log_data = {k: v for k, v in zai_data_dict.items() if k != "model_item"}
         logger.debug(
@@ -676,16 +681,19 @@ async def prepare_request_data(
 
 def process_streaming_response(
     chat_request: ChatRequest, access_token: str
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """处理流式响应。
 
     :param chat_request: 聊天请求对象
     :param access_token: 访问令牌
-    :yields: SSE格式的数据块
+    :yields: SSE格式的数据块（UTF-8 bytes）
     :raises UpstreamAPIError: 当上游API返回错误状态码时
 
     .. note::
        响应格式遵循OpenAI的流式API规范。
+
+    .. note::
+       返回值必须是原生异步生成器：Starlette 对同步迭代器会把每个数据块的迭代转入线程池执行。
     """
     # 检查是否启用 toolify
     enable_toolify = (
@@ -174,6 +174,11 @@ class AppConfig(BaseSettings):
         ge=60,
         description="FE版本缓存时间(秒)"
     )
+    models_cache_ttl: int = Field(
+        default=3600,
+        ge=60,
+        description="模型列表缓存时间(秒)"
+    )
     fe_version_update_interval: int = Field(
         default=1800,
         ge=60,
@@ -206,6 +211,18 @@ class AppConfig(BaseSettings):
         ge=5,
         description="认证请求超时(秒)"
     )
+    timeout_connection_pool: int = Field(
+        default=10,
+        ge=1,
+        description="等待空闲上游连接超时(秒)，超时后返回 503"
+    )
+
+    # 上游连接池配置
+    upstream_max_connections: int = Field(
+        default=1024,
+        ge=1,
+        description="每个浏览器指纹共享会话的最大并发上游请求数（聊天流与文件上传共用）"
+    )
     
     # curl_cffi 浏览器模拟配置
     browser_impersonate: str = Field(
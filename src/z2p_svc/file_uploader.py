@@ -14,12 +14,11 @@ import base64
 import re # 导入 re 模块
 from typing import Any
 
-from curl_cffi.requests import AsyncSession
-
 from .config import get_settings
 from .exceptions import FileUploadError
-from .logger import get_logger, json_str
+from .logger import get_logger, is_level_enabled, json_str
 from .models import UploadedFileObject
+from .utils.http_session import get_shared_session
 from .utils.uuid_helper import generate_uuid_str
 
 logger = get_logger(__name__)
@@ -140,6 +139,20 @@ class FileUploader:
         
         return headers
 
+    def _resolve_filename(self, filename: str | None, file_type: str | None) -> str:
+        """补全文件名：未提供时自动生成，缺少扩展名时追加扩展名。
+        
+        :param filename: 文件名（可选）
+        :param file_type: 文件扩展名（可选），默认为 ``png``
+        :return: 带扩展名的文件名
+        """
+        ext = file_type if file_type else 'png'
+        if not filename:
+            return f"{generate_uuid_str()}.{ext}"
+        if "." not in filename:
+            return f"{filename}.{ext}"
+        return filename
+
     def _get_mime_type(self, filename: str) -> str:
         """根据文件扩展名获取MIME类型。
         
@@ -215,25 +228,42 @@ class FileUploader:
         .. warning::
            文件大小不能超过 :attr:`MAX_FILE_SIZE` (10MB)
         """
-        if not filename:
-            ext = file_type if file_type else 'png'
-            filename = f"{generate_uuid_str()}.{ext}"
-        elif "." not in filename:
-            ext = file_type if file_type else 'png'
-            filename = f"{filename}.{ext}"
-
+        # 先补全默认文件名，解码日志与上传日志记录同一个文件名
+        filename = self._resolve_filename(filename, file_type)
         try:
             file_data = base64.b64decode(base64_data)
             logger.info(
-                "File decoded from base64: filename={}, size={} bytes, mime_type={}",
+                "File decoded from base64: filename={}, size={} bytes",
                 filename,
                 len(file_data),
-                self._get_mime_type(filename),
             )
         except Exception as e:
             logger.error("Base64 decode failed: filename={}, error={}", filename, str(e))
             return None
- 
+
+        return await self.upload_file_bytes(file_data, filename, file_type)
+
+    async def upload_file_bytes(
+        self, file_data: bytes, filename: str | None = None, file_type: str | None = None
+    ) -> dict[str, Any] | None:
+        """上传原始字节文件。
+        
+        供已持有文件字节的调用方（如 ``/v1/files`` 端点）直接使用，
+        避免先编码为 Base64 再在 :meth:`upload_base64_file` 中解码的往返开销。
+        
+        :param file_data: 文件字节数据
+        :param filename: 文件名（可选），未提供时自动生成
+        :param file_type: 文件扩展名（如 ``"png"``、``"pdf"``），可选
+        :type file_data: bytes
+        :type filename: str | None
+        :type file_type: str | None
+        :return: 上传成功返回文件对象，失败返回 None
+        :rtype: dict[str, Any] | None
+        
+        .. seealso::
+           :meth:`upload_base64_file` - 返回的文件对象结构
+        """
+        filename = self._resolve_filename(filename, file_type)
         mime_type = self._get_mime_type(filename)
         
         try:
@@ -250,7 +280,8 @@ class FileUploader:
             self.upload_url,
         )
         
-        if self.settings.verbose_logging:
+        # 脱敏请求头需要构造新字典，仅在 DEBUG 日志实际输出时才构造
+        if self.settings.verbose_logging and is_level_enabled("DEBUG"):
             logger.debug(
                 "File upload request details: filename={}, upload_url={}, headers={}",
                 filename,
@@ -263,70 +294,70 @@ class FileUploader:
             # 导入 CurlMime
             from curl_cffi import CurlMime
             
-            async with AsyncSession(impersonate=self.settings.get_browser_version()) as session:  # type: ignore
-                # 创建 multipart 对象
-                multipart = CurlMime()
-                multipart.addpart(
-                    name="file",
-                    content_type=mime_type,
-                    data=file_data,
-                    filename=filename
+            session = get_shared_session(self.settings.get_browser_version())
+            # 创建 multipart 对象
+            multipart = CurlMime()
+            multipart.addpart(
+                name="file",
+                content_type=mime_type,
+                data=file_data,
+                filename=filename
+            )
+            
+            response = await session.post(
+                self.upload_url,
+                headers=self._get_headers(),
+                multipart=multipart,
+                timeout=float(self.settings.timeout_file_upload),
+            )
+            if response.status_code >= 400:
+                logger.error(
+                    "Upload HTTP error: filename={}, status_code={}, response={}",
+                    filename,
+                    response.status_code,
+                    response.text[:500] if hasattr(response, 'text') else str(response.content)[:500]
                 )
-                
-                response = await session.post(
-                    self.upload_url,
-                    headers=self._get_headers(),
-                    multipart=multipart,
-                    timeout=float(self.settings.timeout_file_upload),
+                raise Exception(f"HTTP {response.status_code}")
+
+            result = response.json()
+            
+            if self.settings.verbose_logging:
+                logger.debug(
+                    "Upload response received: filename={}, status_code={}, response={}",
+                    filename,
+                    response.status_code,
+                    json_str(result)
                 )
-                if response.status_code >= 400:
-                    logger.error(
-                        "Upload HTTP error: filename={}, status_code={}, response={}",
-                        filename,
-                        response.status_code,
-                        response.text[:500] if hasattr(response, 'text') else str(response.content)[:500]
-                    )
-                    raise Exception(f"HTTP {response.status_code}")
+            
+            file_id = result.get("id")
+            file_filename = result.get("filename", filename)
+            cdn_url = result.get("meta", {}).get("cdn_url")
 
-                result = response.json()
+            if file_id:
+                # 确保file_id是纯UUID（不包含文件名）
+                pure_file_id = file_id.split('_')[0] if '_' in file_id else file_id
                 
-                if self.settings.verbose_logging:
-                    logger.debug(
-                        "Upload response received: filename={}, status_code={}, response={}",
-                        filename,
-                        response.status_code,
-                        json_str(result)
-                    )
+                # 使用 Pydantic 模型构建文件对象
+                file_object = UploadedFileObject(
+                    id=pure_file_id,
+                    name=file_filename,
+                    media=self._get_media_type(file_filename),
+                    size=len(file_data),
+                    url=f"/api/v1/files/{pure_file_id}",
+                )
                 
-                file_id = result.get("id")
-                file_filename = result.get("filename", filename)
-                cdn_url = result.get("meta", {}).get("cdn_url")
-
-                if file_id:
-                    # 确保file_id是纯UUID（不包含文件名）
-                    pure_file_id = file_id.split('_')[0] if '_' in file_id else file_id
-                    
-                    # 使用 Pydantic 模型构建文件对象
-                    file_object = UploadedFileObject(
-                        id=pure_file_id,
-                        name=file_filename,
-                        media=self._get_media_type(file_filename),
-                        size=len(file_data),
-                        url=f"/api/v1/files/{pure_file_id}",
-                    )
-                    
-                    logger.info(
-                        "File uploaded: filename={}, file_id={}, size={}, media={}, cdn_url={}",
-                        file_filename,
-                        pure_file_id,
-                        len(file_data),
-                        file_object.media,
-                        cdn_url,
-                    )
-                    return file_object.model_dump()
-                else:
-                    logger.error("Upload response missing data: response={}", json_str(result))
-                    return None
+                logger.info(
+                    "File uploaded: filename={}, file_id={}, size={}, media={}, cdn_url={}",
+                    file_filename,
+                    pure_file_id,
+                    len(file_data),
+                    file_object.media,
+                    cdn_url,
+                )
+                return file_object.model_dump()
+            else:
+                logger.error("Upload response missing data: response={}", json_str(result))
+                return None
 
         except Exception as e:
             logger.error(
@@ -352,42 +383,41 @@ class FileUploader:
         try:
             logger.info("Starting file download from URL: url={}", file_url)
             
-            async with AsyncSession(impersonate=self.settings.get_browser_version()) as session:  # type: ignore
-                response = await session.get(file_url, timeout=float(self.settings.timeout_file_upload))
-                if response.status_code >= 400:
-                    raise Exception(f"HTTP {response.status_code}")
+            session = get_shared_session(self.settings.get_browser_version())
+            response = await session.get(file_url, timeout=float(self.settings.timeout_file_upload))
+            if response.status_code >= 400:
+                raise Exception(f"HTTP {response.status_code}")
 
-                filename = file_url.split("/")[-1]
-                if not filename or "." not in filename:
-                    filename = f"{generate_uuid_str()}.png"
+            filename = file_url.split("/")[-1]
+            if not filename or "." not in filename:
+                filename = f"{generate_uuid_str()}.png"
 
-                base64_data = base64.b64encode(response.content).decode("utf-8")
-
-                logger.info(
-                    "File downloaded successfully: url={}, size={} bytes, filename={}, content_type={}",
-                    file_url,
-                    len(response.content),
-                    filename,
-                    response.headers.get("content-type", "unknown"),
-                )
+            logger.info(
+                "File downloaded successfully: url={}, size={} bytes, filename={}, content_type={}",
+                file_url,
+                len(response.content),
+                filename,
+                response.headers.get("content-type", "unknown"),
+            )
 
-                # 尝试从响应头中获取文件名和MIME类型
-                content_disposition = response.headers.get("content-disposition")
-                if content_disposition:
-                    fname_match = re.search(r'filename\*?=(?:UTF-8\'\')?\"?([^\";]+)\"?', content_disposition)
-                    if fname_match:
-                        filename = fname_match.group(1)
-                
-                mime_type = response.headers.get("content-type", self._get_mime_type(filename))
-                
-                # 在上传前进行验证
-                try:
-                    self._validate_file(response.content, mime_type)
-                except FileUploadError as e:
-                    logger.error("Downloaded file validation failed: url={}, error={}", file_url, str(e))
-                    return None
+            # 尝试从响应头中获取文件名和MIME类型
+            content_disposition = response.headers.get("content-disposition")
+            if content_disposition:
+                fname_match = re.search(r'filename\*?=(?:UTF-8\'\')?\"?([^\";]+)\"?', content_disposition)
+                if fname_match:
+                    filename = fname_match.group(1)
+            
+            mime_type = response.headers.get("content-type", self._get_mime_type(filename))
+            
+            # 在上传前进行验证
+            try:
+                self._validate_file(response.content, mime_type)
+            except FileUploadError as e:
+                logger.error("Downloaded file validation failed: url={}, error={}", file_url, str(e))
+                return None
 
-                return await self.upload_base64_file(base64_data, filename, file_type=mime_type.split('/')[-1])
+            # 直接上传下载得到的原始字节，无需 Base64 编码后再解码
+            return await self.upload_file_bytes(response.content, filename, file_type=mime_type.split('/')[-1])
 
         except Exception as e:
             logger.error(
@@ -9,6 +9,12 @@ from typing import Any
 import orjson
 from loguru import logger
 
+# loguru 内置级别的序号，供 is_level_enabled 免锁查询
+_LEVEL_NOS = {"TRACE": 5, "DEBUG": 10, "INFO": 20, "SUCCESS": 25, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+# 当前生效的最低日志级别序号，configure_logging 调用前不过滤任何级别
+_min_level_no: int = 0
+
 
 def configure_logging(log_level: str = "INFO", use_colors: bool = True, verbose: bool = False) -> None:
     """配置loguru日志系统。
@@ -38,9 +44,11 @@ def configure_logging(log_level: str = "INFO", use_colors: bool = True, verbose:
        - INFO: 输出关键业务日志和访问令牌审计信息（脱敏显示）
        - WARNING及以上: 仅输出警告和错误信息
     """
+    global _min_level_no
     logger.remove()
     
     level = log_level.upper()
+    _min_level_no = logger.level(level).no
     
     if verbose:
         # 详细模式：用于开发环境，包含完整信息和诊断
@@ -93,6 +101,18 @@ def json_str(obj: Any) -> str:
     return orjson.dumps(obj).decode('utf-8')
 
 
+def is_level_enabled(level: str) -> bool:
+    """判断指定级别的日志当前是否会被输出。
+
+    loguru 会在格式化前按级别过滤，但调用处的参数总会先求值；
+    热路径上参数需要额外计算（如 :func:`json_str`）时，可先用此函数判断。
+
+    :param level: 日志级别名称，如 ``"INFO"``
+    :return: 级别不低于当前配置时返回 True
+    """
+    return _LEVEL_NOS[level] >= _min_level_no
+
+
 def get_logger(name: str | None = None):
     """获取logger实例。
 
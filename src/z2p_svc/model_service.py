@@ -4,8 +4,11 @@
 参考temp.py中的get_model_id和get_model_name函数实现。
 """
 
+import asyncio
 from curl_cffi.requests import AsyncSession
 import stamina
+import time
+from functools import lru_cache
 from typing import Any, Dict, List
 from datetime import datetime
 
@@ -21,6 +24,15 @@ logger = get_logger(__name__)
 settings = get_settings()
 
 _models_cache: dict[str, Any] | None = None
+_models_cache_expiry: float = 0.0
+
+# 模型列表刷新锁，避免缓存过期时并发请求重复访问上游；
+# asyncio.Lock 会绑定到首次等待它的事件循环，因此按事件循环惰性创建
+_models_refresh_lock: asyncio.Lock | None = None
+_models_refresh_lock_loop: asyncio.AbstractEventLoop | None = None
+
+# 缓存过期后刷新失败时，旧缓存再延长使用的时间（秒）
+MODELS_REFRESH_RETRY_DELAY = 60.0
 _upstream_models_cache: list[dict[str, Any]] = []
 
 # 定义所有可能的功能开关及其尾缀和描述
@@ -50,6 +62,36 @@ FEATURE_SWITCHES: Dict[str, Dict[str, Any]] = {
 }
 
 
+@lru_cache(maxsize=64)
+def get_enabled_features(*capability_flags: bool) -> tuple[str, ...]:
+    """根据能力开关组合计算需要生成变体的功能键。
+    
+    大量上游模型共享相同的能力组合，因此按布尔元组缓存结果，
+    避免每个模型都重新遍历 :data:`FEATURE_SWITCHES`。
+    
+    :param capability_flags: 按 :data:`FEATURE_SWITCHES` 键顺序排列的能力开关
+    :return: 需要生成变体的功能键元组（保持 :data:`FEATURE_SWITCHES` 顺序）
+    
+    .. note::
+       ``negate`` 为 True 的功能（如 ``think``）同样在能力启用时生成变体，
+       只是变体语义为禁用该功能（如 ``-nothinking``）
+    """
+    return tuple(
+        feature_key
+        for feature_key, is_enabled in zip(FEATURE_SWITCHES, capability_flags)
+        if is_enabled
+    )
+
+
+def get_capability_flags(capabilities: Any) -> tuple[bool, ...]:
+    """提取模型能力对象中与 :data:`FEATURE_SWITCHES` 对应的开关元组。
+    
+    :param capabilities: 上游模型能力对象（:class:`UpstreamCapability`）
+    :return: 按 :data:`FEATURE_SWITCHES` 键顺序排列的布尔元组
+    """
+    return tuple(bool(getattr(capabilities, feature_key, False)) for feature_key in FEATURE_SWITCHES)
+
+
 def format_model_name(name: str) -> str:
     """格式化模型名称。
     
@@ -204,7 +246,9 @@ async def get_models(access_token: str | None = None, use_cache: bool = True) ->
        **缓存机制:**
        
        - 首次调用时从上游 API 获取并缓存
-       - 后续调用返回缓存数据（除非 ``use_cache=False``）
+       - 后续调用在 ``MODELS_CACHE_TTL`` 内直接返回同一个缓存字典（除非 ``use_cache=False``）
+       - 缓存过期后重新获取，获取失败时继续返回旧缓存
+       - 同一时刻只有一个请求访问上游，刷新期间其余请求直接返回旧缓存
        - 使用 :func:`clear_models_cache` 清除缓存
     
     .. note::
@@ -215,18 +259,62 @@ async def get_models(access_token: str | None = None, use_cache: bool = True) ->
        - 自动更新反向映射表
        - MCP 工具默认从上游模型能力中获取，无需单独变体
     """
-    global _models_cache
+    global _models_cache, _models_cache_expiry
     
     if use_cache and _models_cache:
-        cached_count = len(_models_cache.get("data", []))
-        logger.info("Returning cached models: cached_count={}", cached_count)
-        return _models_cache
-    
-    logger.info("Fetching fresh models from upstream: use_cache={}", use_cache)
+        if time.monotonic() < _models_cache_expiry:
+            # 每个请求都会经过此处，仅在调试级别记录
+            logger.debug("Returning cached models: cached_count={}", len(_models_cache.get("data", [])))
+            return _models_cache
+        if _get_models_refresh_lock().locked():
+            # 已有请求正在刷新，其余请求直接返回旧缓存
+            return _models_cache
+        logger.info("Models cache expired, refreshing from upstream")
+    else:
+        logger.info("Fetching fresh models from upstream: use_cache={}", use_cache)
+    
+    # 同一时刻只有一个请求访问上游；等待锁的请求拿到锁后复用刚刷新的缓存
+    async with _get_models_refresh_lock():
+        if use_cache and _models_cache and time.monotonic() < _models_cache_expiry:
+            return _models_cache
+        return await _refresh_models(access_token, use_cache)
+
+
+def _get_models_refresh_lock() -> asyncio.Lock:
+    """获取当前事件循环的模型列表刷新锁。
+
+    锁在首次使用时创建；事件循环变化时（例如测试或重新启动）重新创建，
+    避免在新循环中等待绑定到旧循环的锁而抛出 ``RuntimeError``。
+
+    :return: 绑定到当前事件循环的刷新锁
+    """
+    global _models_refresh_lock, _models_refresh_lock_loop
+
+    loop = asyncio.get_running_loop()
+    if _models_refresh_lock is None or _models_refresh_lock_loop is not loop:
+        _models_refresh_lock = asyncio.Lock()
+        _models_refresh_lock_loop = loop
+    return _models_refresh_lock
+
+
+async def _refresh_models(access_token: str | None, use_cache: bool) -> dict[str, Any]:
+    """从上游获取模型列表、生成变体并更新缓存，调用方需持有 :func:`_get_models_refresh_lock` 返回的锁。
     
-    global _upstream_models_cache
+    :param access_token: 访问令牌（可选）
+    :param use_cache: 获取失败时是否回退到旧缓存
+    :return: 格式化后的模型列表字典
+    """
+    global _models_cache, _models_cache_expiry, _upstream_models_cache
     
-    upstream_raw_data = await fetch_models_from_upstream(access_token)
+    try:
+        upstream_raw_data = await fetch_models_from_upstream(access_token)
+    except Exception as e:
+        if not (use_cache and _models_cache):
+            raise
+        # 刷新失败时继续使用旧缓存，稍后再重试
+        logger.warning("Models refresh failed, serving stale cache: error={}", str(e))
+        _models_cache_expiry = time.monotonic() + MODELS_REFRESH_RETRY_DELAY
+        return _models_cache
     upstream_data = UpstreamModelsResponse.model_validate(upstream_raw_data)
     
     # 缓存上游原始数据
@@ -283,14 +371,11 @@ async def get_models(access_token: str | None = None, use_cache: bool = True) ->
         )
         
         # 为所有激活的模型生成变体（不再限制只为已映射的模型生成）
+        enabled_features: tuple[str, ...] = ()
         if model_meta and model_meta.capabilities:
-            for feature_key, feature_config in FEATURE_SWITCHES.items():
-                is_enabled = getattr(model_meta.capabilities, feature_key, False)
-                
-                # 如果是 "think" 且 negate 为 True，则当 think 为 True 时生成 nothinking 变体
-                # 否则，当功能启用时生成变体
-                should_generate_variant = (is_enabled and not feature_config.get("negate", False)) or \
-                                          (is_enabled and feature_config.get("negate", False))
+            enabled_features = get_enabled_features(*get_capability_flags(model_meta.capabilities))
+            for feature_key in enabled_features:
+                feature_config = FEATURE_SWITCHES[feature_key]
                 
                 # 检查模型名称是否已经包含该功能标识，避免重复变体
                 # 例如 glm-4.5v 已经表示 vision，不应再生成 glm-4.5v-vision
@@ -309,7 +394,7 @@ async def get_models(access_token: str | None = None, use_cache: bool = True) ->
                     model_name_lower = processed_name.lower().replace("-", "").replace("_", "")
                     already_has_feature = feature_name_lower in model_name_lower
                 
-                if should_generate_variant and not already_has_feature:
+                if not already_has_feature:
                     variant_id = f"{processed_id}{feature_config['suffix']}"
                     variant_name = f"{processed_name}{feature_config['name_suffix']}"
                     
@@ -373,53 +458,48 @@ async def get_models(access_token: str | None = None, use_cache: bool = True) ->
             )
             
             # 为 glm-4.6v 生成功能变体（基于 glm-4.6 的能力）
-            if model_meta and model_meta.capabilities:
-                for feature_key, feature_config in FEATURE_SWITCHES.items():
-                    # 跳过 vision 功能（glm-4.6v 本身就是 vision 变体）
-                    if feature_key == "vision":
-                        continue
-                    
-                    is_enabled = getattr(model_meta.capabilities, feature_key, False)
-                    
-                    should_generate_variant = (is_enabled and not feature_config.get("negate", False)) or \
-                                              (is_enabled and feature_config.get("negate", False))
-                    
-                    if should_generate_variant:
-                        glm46v_variant_id = f"{vision_variant_id}{feature_config['suffix']}"
-                        glm46v_variant_name = f"{vision_variant_name}{feature_config['name_suffix']}"
-                        
-                        glm46v_variant_model = DownstreamModel(
-                            id=glm46v_variant_id,
-                            object="model",
-                            name=glm46v_variant_name,
-                            created=model_info.created_at or int(datetime.now().timestamp()),
-                            owned_by="z.ai",
-                        )
-                        downstream_models.append(glm46v_variant_model)
-                        
-                        # glm-4.6v 的变体映射到 glm-4.6v，再映射到 glm-4.6
-                        if glm46v_variant_id not in settings.REVERSE_MODELS_MAPPING:
-                            settings.REVERSE_MODELS_MAPPING[glm46v_variant_id] = vision_variant_id
-                            logger.info(
-                                "Added reverse mapping for glm-4.6v variant: {} -> {}",
-                                glm46v_variant_id,
-                                vision_variant_id
-                            )
-                        logger.info(
-                            "Generated glm-4.6v variant: base_id={}, base_name={} -> variant_id={}, variant_name={}, feature={}",
-                            vision_variant_id,
-                            vision_variant_name,
-                            glm46v_variant_id,
-                            glm46v_variant_name,
-                            feature_key
-                        )
+            for feature_key in enabled_features:
+                # 跳过 vision 功能（glm-4.6v 本身就是 vision 变体）
+                if feature_key == "vision":
+                    continue
+                
+                feature_config = FEATURE_SWITCHES[feature_key]
+                glm46v_variant_id = f"{vision_variant_id}{feature_config['suffix']}"
+                glm46v_variant_name = f"{vision_variant_name}{feature_config['name_suffix']}"
+                
+                glm46v_variant_model = DownstreamModel(
+                    id=glm46v_variant_id,
+                    object="model",
+                    name=glm46v_variant_name,
+                    created=model_info.created_at or int(datetime.now().timestamp()),
+                    owned_by="z.ai",
+                )
+                downstream_models.append(glm46v_variant_model)
+                
+                # glm-4.6v 的变体映射到 glm-4.6v，再映射到 glm-4.6
+                if glm46v_variant_id not in settings.REVERSE_MODELS_MAPPING:
+                    settings.REVERSE_MODELS_MAPPING[glm46v_variant_id] = vision_variant_id
+                    logger.info(
+                        "Added reverse mapping for glm-4.6v variant: {} -> {}",
+                        glm46v_variant_id,
+                        vision_variant_id
+                    )
+                logger.info(
+                    "Generated glm-4.6v variant: base_id={}, base_name={} -> variant_id={}, variant_name={}, feature={}",
+                    vision_variant_id,
+                    vision_variant_name,
+                    glm46v_variant_id,
+                    glm46v_variant_name,
+                    feature_key
+                )
     
     result = DownstreamModelsResponse(
         object="list",
         data=downstream_models,
     )
     
-    _models_cache = result.model_dump()  # 缓存 Pydantic 模型转换为字典
+    _models_cache = result.model_dump()  # 缓存 Pydantic 模型转换为字典，只序列化一次
+    _models_cache_expiry = time.monotonic() + settings.models_cache_ttl
     
     upstream_total = len(upstream_data.data)
     active_count = len([m for m in upstream_data.data if m.info.is_active])
@@ -437,7 +517,28 @@ async def get_models(access_token: str | None = None, use_cache: bool = True) ->
     if settings.verbose_logging:
         logger.debug("Current reverse mappings: {}", json_str(dict(settings.REVERSE_MODELS_MAPPING)))
     
-    return result.model_dump()  # 返回 Pydantic 模型转换为字典
+    return _models_cache
+
+
+def get_models_cache() -> dict[str, Any] | None:
+    """获取已缓存的模型列表，不触发上游请求。
+    
+    :return: 缓存的模型列表字典（可能已过期）；尚未加载时返回 None
+    :rtype: dict[str, Any] | None
+    
+    .. note::
+       过期的缓存由路由层在后台刷新，请求处理链路中可直接复用
+    """
+    return _models_cache
+
+
+def is_models_cache_expired() -> bool:
+    """判断模型列表缓存是否需要刷新。
+    
+    :return: 缓存已过期或尚未加载时返回 True
+    :rtype: bool
+    """
+    return time.monotonic() >= _models_cache_expiry
 
 
 def get_upstream_models_cache() -> list[dict[str, Any]]:
@@ -455,7 +556,8 @@ def clear_models_cache() -> None:
     .. note::
        清除缓存后，下次调用 :func:`get_models` 将重新从上游 API 获取数据
     """
-    global _models_cache, _upstream_models_cache
+    global _models_cache, _models_cache_expiry, _upstream_models_cache
     _models_cache = None
+    _models_cache_expiry = 0.0
     _upstream_models_cache = []
     logger.debug("Models cache cleared")
\ No newline at end of file
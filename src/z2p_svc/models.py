@@ -23,7 +23,9 @@ class Tool(BaseModel):
     
     表示一个可供模型调用的工具。
     """
-    type: Literal["function"] = Field(default="function", description="工具类型（目前仅支持 function）")
+    model_config = {"frozen": True}
+
+    type: Literal["function"] = Field(default="function", frozen=True, description="工具类型（目前仅支持 function）")
     function: ToolFunction = Field(..., description="函数定义")
 
 
@@ -115,10 +117,9 @@ class UpstreamCapability(BaseModel):
     - returnFc: 返回函数调用
     - returnThink: 返回思考过程
     
-    注意：Pydantic 的 model_config 允许额外字段，以支持未来可能添加的新能力。
+    注意：未定义的能力字段会被忽略（Pydantic 默认行为），变体生成只读取下列已知字段；
+    需要完整能力信息时使用上游原始数据（见 ``get_upstream_models_cache``）。
     """
-    model_config = {"extra": "allow"}  # 允许额外的未定义字段
-    
     # 定义已知的常见能力字段（带默认值）
     vision: bool = Field(default=False, description="视觉能力：支持图像理解和分析（如 GLM-4.5V）")
     citations: bool = Field(default=False, description="引用来源：在回答中提供信息来源引用")
@@ -321,12 +322,15 @@ class DownstreamModel(BaseModel):
     - 基础模型（如：glm-4.6）
     - 功能变体（如：glm-4.6-nothinking、glm-4.6-search、glm-4.6-mcp）
     """
+    model_config = {"frozen": True}
+
     id: str = Field(
         ...,
         description="模型唯一标识符（如：glm-4.6、glm-4.6-nothinking、glm-4.6-search）"
     )
     object: str = Field(
         default="model",
+        frozen=True,
         description="对象类型（固定为 model，符合 OpenAI 规范）"
     )
     created: int = Field(
@@ -352,8 +356,11 @@ class DownstreamModelsResponse(BaseModel):
     本转换程序将上游的非标准模型列表转换为标准 OpenAI 格式，
     并为已映射的模型自动生成功能变体（-nothinking、-search、-mcp 等）。
     """
+    model_config = {"frozen": True}
+
     object: str = Field(
         default="list",
+        frozen=True,
         description="对象类型（固定为 list，符合 OpenAI 规范）"
     )
     data: List[DownstreamModel] = Field(
@@ -395,8 +402,10 @@ class ChatCompletionChunk(BaseModel):
     符合 OpenAI API 规范的流式响应格式。
     参考：https://platform.openai.com/docs/api-reference/chat/streaming
     """
+    model_config = {"frozen": True}
+
     id: str = Field(..., description="响应唯一标识符（如 chatcmpl-xxx）")
-    object: str = Field(default="chat.completion.chunk", description="对象类型")
+    object: str = Field(default="chat.completion.chunk", frozen=True, description="对象类型")
     created: int = Field(..., description="创建时间戳（Unix 时间）")
     model: str = Field(..., description="使用的模型名称")
     choices: List[ChatCompletionChunkChoice] = Field(..., description="响应选择列表")
@@ -478,7 +487,6 @@ class UpstreamRequestParams(BaseModel):
 
     包含发送到上游 API 的查询参数，用于请求签名和追踪。
     """
-    model_config = {"extra": "allow"}  # 允许额外字段
 
     requestId: str = Field(..., description="请求唯一标识符（UUID）")
     timestamp: str = Field(..., description="请求时间戳（毫秒）")
@@ -568,6 +576,10 @@ class UpstreamRequestData(BaseModel):
     
     .. note::
        此模型与 OpenAI API 不完全兼容，包含智谱 AI 扩展字段
+
+    .. note::
+       ``messages``、``params``、``files``、``features``、``model_item`` 为原样转发给上游的数据，
+       声明为 ``Any`` 以跳过逐元素的深度校验
     
     .. warning::
        ``signature_prompt`` 字段用于生成请求签名，必须与实际发送的内容一致
@@ -576,13 +588,13 @@ class UpstreamRequestData(BaseModel):
     
     stream: bool = Field(..., description="是否使用流式响应")
     model: str = Field(..., description="上游模型 ID")
-    messages: List[Dict[str, Any]] = Field(..., description="转换后的消息列表")
+    messages: Any = Field(..., description="转换后的消息列表")
     signature_prompt: str = Field(default="", description="用于签名的提示词内容")
-    params: Dict[str, Any] = Field(default_factory=dict, description="生成参数（temperature, top_p, max_tokens）")
-    files: List[Dict[str, Any]] = Field(default_factory=list, description="非媒体文件列表")
-    features: Dict[str, Any] = Field(default_factory=dict, description="功能特性配置（包含 features 数组）")
+    params: Any = Field(default_factory=dict, description="生成参数（temperature, top_p, max_tokens）")
+    files: Any = Field(default_factory=list, description="非媒体文件列表")
+    features: Any = Field(default_factory=dict, description="功能特性配置（包含 features 数组）")
     variables: Dict[str, str] = Field(default_factory=dict, description="模板变量（日期时间等）")
-    model_item: Optional[Dict[str, Any]] = Field(default=None, description="完整的模型对象")
+    model_item: Any = Field(default=None, description="完整的模型对象")
     background_tasks: Dict[str, bool] = Field(
         default_factory=lambda: {"title_generation": True, "tags_generation": True},
         description="后台任务配置"
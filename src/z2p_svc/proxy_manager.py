@@ -1,21 +1,51 @@
 """Mihomo代理管理模块。"""
 
+import asyncio
+
 from curl_cffi.requests import AsyncSession
-from .config import get_settings
+from .config import AppConfig, get_settings
 from .logger import get_logger
 
 logger = get_logger(__name__)
 
+# 连接超时（秒）：Mihomo API 通常在本机或内网，连接阶段应快速失败
+MIHOMO_CONNECT_TIMEOUT = 2.0
+# 整体预算在单次请求超时之外额外预留的时间（秒）
+MIHOMO_BUDGET_SLACK = 1.0
+
 
 async def switch_proxy_node() -> bool:
     """切换到下一个代理节点。
     
+    GET 与 PUT 两次请求共享同一个总时间预算
+    （``timeout_proxy_switch + MIHOMO_BUDGET_SLACK``），
+    避免代理卡死时在请求路径上累积两倍的超时等待。
+    
     :return: 切换成功返回True，否则返回False
     """
     settings = get_settings()
     if not settings.enable_mihomo_switch or not settings.mihomo_api_url:
         return False
     
+    budget = float(settings.timeout_proxy_switch) + MIHOMO_BUDGET_SLACK
+    try:
+        return await asyncio.wait_for(_switch_proxy_node(settings), timeout=budget)
+    except asyncio.TimeoutError:
+        logger.error("Proxy switch timed out: budget={}s", budget)
+        return False
+
+
+async def _switch_proxy_node(settings: AppConfig) -> bool:
+    """执行代理节点切换（不含总时间预算控制）。
+    
+    :param settings: 应用配置
+    :return: 切换成功返回True，否则返回False
+    """
+    # (连接超时, 读取超时)
+    timeout = (
+        min(MIHOMO_CONNECT_TIMEOUT, float(settings.timeout_proxy_switch)),
+        float(settings.timeout_proxy_switch),
+    )
     try:
         headers = {}
         if settings.mihomo_api_secret:
@@ -26,7 +56,7 @@ async def switch_proxy_node() -> bool:
             resp = await session.get(
                 f"{settings.mihomo_api_url}/proxies",
                 headers=headers,
-                timeout=float(settings.timeout_proxy_switch)
+                timeout=timeout
             )
             if resp.status_code != 200:
                 logger.error("Failed to get proxies: status={}", resp.status_code)
@@ -68,7 +98,7 @@ async def switch_proxy_node() -> bool:
                 f"{settings.mihomo_api_url}/proxies/{proxy_group}",
                 headers=headers,
                 json={"name": next_node},
-                timeout=float(settings.timeout_proxy_switch)
+                timeout=timeout
             )
             
             if switch_resp.status_code == 204:
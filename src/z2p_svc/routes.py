@@ -3,11 +3,11 @@
 本模块定义所有HTTP端点，包括聊天补全、模型列表和CORS预检请求处理。
 """
 
-import base64
-import json
+import asyncio
 import time
-from typing import AsyncGenerator, Union
+from typing import Any, Union
 
+import orjson
 from fastapi import APIRouter, Request, Response, UploadFile, File
 from fastapi.responses import StreamingResponse
 
@@ -17,61 +17,208 @@ from .chat_service import (
 )
 from .config import get_settings
 from .exceptions import UpstreamAPIError
-from .logger import get_logger
-from .models import ChatRequest, FileObject, ErrorResponse, ErrorDetail
-from .model_service import get_models
+from .logger import get_logger, is_level_enabled
+from .models import ChatRequest, DownstreamModelsResponse, FileObject
+from .model_service import get_models, get_models_cache, is_models_cache_expired
 from .file_uploader import FileUploader
-from .utils.uuid_helper import generate_chat_id
+from .utils.uuid_helper import generate_chat_id_hex
 
 logger = get_logger(__name__)
 router = APIRouter()
 settings = get_settings()
 
+# 静态错误响应体在导入时预先序列化，未授权分支无需每次编码
+_UNAUTHORIZED_BODY = orjson.dumps({"message": "Unauthorized: Access token is missing"})
+_UPLOAD_UNAUTHORIZED_BODY = orjson.dumps(
+    {"error": {"message": "Unauthorized: Access token is missing", "type": "authentication_error", "code": 401}}
+)
+
+
+# 预检响应头在导入时构建一次；Max-Age 让浏览器缓存预检结果，减少 OPTIONS 请求
+_PREFLIGHT_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    "Access-Control-Max-Age": "86400",
+}
+
+# SSE 响应头在导入时构建一次，StreamingResponse 只读取不修改。
+# 分块传输编码由 ASGI 服务器自动设置；X-Accel-Buffering 关闭 Nginx 缓冲以便逐块推送
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+# /v1/files 读取上传文件的分块大小（字节）
+_UPLOAD_READ_CHUNK_SIZE = 64 * 1024
+
+# 配置中的默认允许模型在运行期间不变，导入时构建一次供回退分支复用
+_DEFAULT_ALLOWED_IDS = frozenset(model["id"] for model in settings.ALLOWED_MODELS)
+_DEFAULT_ALLOWED_IDS_STR = ", ".join(sorted(_DEFAULT_ALLOWED_IDS))
+
+# 允许模型 ID 集合缓存：get_models 命中缓存时返回同一个字典对象，
+# 因此以该对象为键即可复用已构建的 frozenset
+_allowed_ids_source: dict[str, Any] | None = None
+_allowed_ids: frozenset[str] = frozenset()
+
+# 模型列表缓存过期后的后台刷新任务；过期与否完全由 model_service 的缓存决定
+_models_refresh_task: asyncio.Task | None = None
+
+# /models 响应体缓存：与允许模型集合相同，以 get_models 返回的字典对象为键
+_models_body_source: dict[str, Any] | None = None
+_models_body: bytes = b""
+
+
+def _parse_access_token(auth_header: str | None) -> str | None:
+    """从 Authorization 头中解析访问令牌。
+
+    常见的 ``Bearer `` 前缀通过 ``startswith`` 加切片处理，无需扫描整串或分配列表。
+
+    :param auth_header: Authorization 头的原始值
+    :return: 访问令牌（``Bearer xxx`` 取 ``xxx``，其他前缀取最后一个空格之后的部分，
+        无空格时原样返回）；头部缺失时返回 None
+    """
+    if not auth_header:
+        return None
+    if auth_header.startswith("Bearer "):
+        return auth_header[7:]
+    return auth_header.rpartition(" ")[2]
+
+
+def _get_allowed_model_ids(models_data: dict[str, Any]) -> frozenset[str]:
+    """获取模型列表对应的允许模型 ID 集合。
+
+    :param models_data: :func:`get_models` 返回的模型列表字典
+    :return: 允许的模型 ID 集合
+    """
+    global _allowed_ids_source, _allowed_ids
+    if models_data is not _allowed_ids_source:
+        _allowed_ids = frozenset(model["id"] for model in models_data.get("data", []))
+        _allowed_ids_source = models_data
+    return _allowed_ids
+
+
+async def _refresh_models_in_background(access_token: str) -> None:
+    """后台刷新模型列表缓存，失败时仅记录日志，下次请求会再次尝试。
+
+    :param access_token: 用于获取模型列表的访问令牌
+    """
+    global _models_refresh_task
+    try:
+        await get_models(access_token=access_token, use_cache=True)
+    except Exception as e:
+        logger.warning("Background refresh of models failed: error={}", str(e))
+    finally:
+        _models_refresh_task = None
+
+
+async def _load_allowed_model_ids(access_token: str) -> frozenset[str]:
+    """获取当前模型列表缓存对应的允许模型 ID 集合。
+
+    直接使用 model_service 的模型列表缓存，与 ``/models`` 和请求准备阶段看到的列表一致。
+    尚未加载过模型列表时等待获取；缓存已过期时在后台刷新，本次请求继续使用当前列表校验。
+
+    :param access_token: 用于获取模型列表的访问令牌
+    :return: 允许的模型 ID 集合
+    """
+    global _models_refresh_task
+    models_data = get_models_cache()
+    if models_data is None:
+        models_data = await get_models(access_token=access_token, use_cache=True)
+    elif is_models_cache_expired() and _models_refresh_task is None:
+        _models_refresh_task = asyncio.create_task(_refresh_models_in_background(access_token))
+    return _get_allowed_model_ids(models_data)
+
+
+def _get_models_body(models_data: dict[str, Any]) -> bytes:
+    """获取模型列表序列化后的响应体。
+
+    :param models_data: :func:`get_models` 返回的模型列表字典
+    :return: orjson 编码的 JSON 字节串
+    """
+    global _models_body_source, _models_body
+    if models_data is not _models_body_source:
+        _models_body = orjson.dumps(models_data)
+        _models_body_source = models_data
+    return _models_body
+
+
+def _json_response(content: Any, status_code: int = 200) -> Response:
+    """使用 orjson 直接序列化为 JSON 响应。
+
+    跳过 FastAPI 对返回字典执行的 ``jsonable_encoder`` 和标准库 JSON 编码。
+    未使用 ``ORJSONResponse``：新版 FastAPI 已将其标记为弃用。
+
+    :param content: 可被 orjson 序列化的对象
+    :param status_code: HTTP 状态码
+    :return: JSON 响应
+    """
+    return Response(status_code=status_code, content=orjson.dumps(content), media_type="application/json")
+
+
+def _error_response(status_code: int, message: str, error_type: str, code: int | None = None) -> Response:
+    """构建 OpenAI 兼容的 JSON 错误响应。
+
+    :param status_code: HTTP 状态码
+    :param message: 错误消息
+    :param error_type: 错误类型
+    :param code: 错误代码，默认与 ``status_code`` 相同
+    :return: 包含 ``{"error": {...}}`` 结构的响应
+    """
+    return _json_response(
+        {
+            "error": {
+                "message": message,
+                "type": error_type,
+                "code": status_code if code is None else code,
+            }
+        },
+        status_code,
+    )
+
 
 @router.options("/chat/completions")
 async def chat_completions_options() -> Response:
     """处理CORS预检请求。
 
-    :return: 包含CORS头的响应
+    携带 ``Origin`` 和 ``Access-Control-Request-Method`` 的标准预检请求由 ``CORSMiddleware``
+    在路由分发前直接应答，此处理器只处理其余的 OPTIONS 请求。
+
+    :return: 包含CORS头的空响应
     """
-    return Response(
-        status_code=200,
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "POST, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization",
-        },
-    )
+    return Response(status_code=204, headers=_PREFLIGHT_HEADERS)
 
 
-@router.get("/models")
-async def list_models(request: Request) -> dict:
+@router.get("/models", response_model=DownstreamModelsResponse)
+async def list_models(request: Request) -> Response:
     """列出所有可用的模型。
     
     从上游 API 动态获取模型列表，并进行智能处理和格式化。
 
     :param request: FastAPI 请求对象，用于获取认证信息
     :type request: Request
-    :return: 包含模型列表的字典
-    :rtype: dict
+    :return: 包含模型列表的 JSON 响应
+    :rtype: Response
     
     .. note::
        支持通过 Authorization 头传递访问令牌
+    
+    .. note::
+       模型列表已经是普通字典，直接使用 orjson 序列化，且在模型缓存未变化时复用已编码的响应体；
+       ``DownstreamModelsResponse`` 仅用于生成 OpenAPI 文档
     """
-    auth_header = request.headers.get("Authorization")
-    access_token = None
-    if auth_header and " " in auth_header:
-        access_token = auth_header.split(" ")[-1]
+    access_token = _parse_access_token(request.headers.get("Authorization"))
     
     try:
         models_data = await get_models(access_token=access_token, use_cache=True)
-        return models_data
+        return Response(content=_get_models_body(models_data), media_type="application/json")
     except Exception as e:
         logger.error("Failed to fetch models: error={}", str(e))
-        return {"error": str(e)}
+        return _json_response({"error": str(e)})
 
-@router.post("/v1/files", response_model=None)
-async def upload_file(request: Request, file: UploadFile = File(...)) -> Union[dict, Response]:
+@router.post("/v1/files", response_model=FileObject)
+async def upload_file(request: Request, file: UploadFile = File(...)) -> Response:
     """处理文件上传请求（OpenAI 兼容）。
 
     :param request: FastAPI 请求对象，用于获取认证信息
@@ -79,33 +226,40 @@ async def upload_file(request: Request, file: UploadFile = File(...)) -> Union[d
     :type request: Request
     :type file: UploadFile
     :return: 符合 OpenAI 文件对象规范的响应
-    :rtype: Union[dict, Response]
+    :rtype: Response
     
     .. note::
        需要在 Authorization 头中提供 Bearer token
     """
-    auth_header = request.headers.get("Authorization")
-    access_token = None
-    if auth_header and " " in auth_header:
-        access_token = auth_header.split(" ")[-1]
+    access_token = _parse_access_token(request.headers.get("Authorization"))
 
     if not access_token:
         logger.warning("Missing authorization header for file upload")
-        return Response(
-            status_code=401,
-            content=json.dumps({"error": {"message": "Unauthorized: Access token is missing", "type": "authentication_error", "code": 401}}),
-            media_type="application/json",
-        )
+        return Response(status_code=401, content=_UPLOAD_UNAUTHORIZED_BODY, media_type="application/json")
 
     try:
-        chat_id = generate_chat_id()
-        file_uploader = FileUploader(access_token, chat_id.replace('-', ''))
+        file_uploader = FileUploader(access_token, generate_chat_id_hex())
         
-        file_content = await file.read()
-        base64_encoded_content = base64.b64encode(file_content).decode("utf-8")
+        # 分块读取并在超过大小限制时立即拒绝；直接上传原始字节，省去 Base64 编码再解码的往返
+        chunks: list[bytes] = []
+        total_size = 0
+        while chunk := await file.read(_UPLOAD_READ_CHUNK_SIZE):
+            total_size += len(chunk)
+            if total_size > FileUploader.MAX_FILE_SIZE:
+                logger.warning(
+                    "File too large via /v1/files: filename={}, max_size={}",
+                    file.filename,
+                    FileUploader.MAX_FILE_SIZE,
+                )
+                return _error_response(
+                    413,
+                    f"File too large, maximum allowed is {FileUploader.MAX_FILE_SIZE} bytes",
+                    "invalid_request_error",
+                )
+            chunks.append(chunk)
+        file_content = b"".join(chunks)
         
-        # 调用 FileUploader 的 upload_base64_file 方法
-        file_id_with_filename = await file_uploader.upload_base64_file(base64_encoded_content, filename=file.filename)
+        file_id_with_filename = await file_uploader.upload_file_bytes(file_content, filename=file.filename)
         
         if not file_id_with_filename:
             raise Exception("File upload failed, no ID returned from upstream.")
@@ -130,33 +284,24 @@ async def upload_file(request: Request, file: UploadFile = File(...)) -> Union[d
             pure_file_id,
         )
 
-        # 使用 Pydantic 模型构建响应
-        file_obj = FileObject(
-            id=pure_file_id,
-            bytes=file.size,
-            created_at=int(time.time()),
-            filename=file.filename,
-            purpose="assistants"
+        # 字段已在上方校验，直接构建字典并序列化；FileObject 仅用于生成 OpenAPI 文档
+        return _json_response(
+            {
+                "id": pure_file_id,
+                "object": "file",
+                "bytes": file.size,
+                "created_at": int(time.time()),
+                "filename": file.filename,
+                "purpose": "assistants",
+            }
         )
-        return file_obj.model_dump()
     except Exception as e:
         logger.error("File upload failed via /v1/files: error={}", str(e))
-        error_response = ErrorResponse(
-            error=ErrorDetail(
-                message=f"File upload failed: {str(e)}",
-                type="file_upload_error",
-                code=500
-            )
-        )
-        return Response(
-            status_code=500,
-            content=error_response.model_dump_json(),
-            media_type="application/json",
-        )
+        return _error_response(500, f"File upload failed: {str(e)}", "file_upload_error")
 
 
 @router.post("/chat/completions", response_model=None)
-async def chat_completions(request: Request, chat_request: ChatRequest) -> Union[dict, Response, StreamingResponse]:
+async def chat_completions(request: Request, chat_request: ChatRequest) -> Union[Response, StreamingResponse]:
     """处理聊天补全请求（OpenAI 兼容）。
 
     支持流式和非流式两种响应模式，根据 ``chat_request.stream`` 参数决定。
@@ -178,16 +323,10 @@ async def chat_completions(request: Request, chat_request: ChatRequest) -> Union
        - 流式：返回 Server-Sent Events (SSE) 格式
        - 非流式：返回完整的 JSON 响应
     """
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
+    access_token = _parse_access_token(request.headers.get("Authorization"))
+    if not access_token:
         logger.warning("Missing authorization header")
-        return Response(
-            status_code=401,
-            content=json.dumps({"message": "Unauthorized: Access token is missing"}),
-            media_type="application/json",
-        )
-
-    access_token = auth_header.split(" ")[-1] if " " in auth_header else auth_header
+        return Response(status_code=401, content=_UNAUTHORIZED_BODY, media_type="application/json")
     
     # 提取客户端的 Accept-Language 头部并注入到请求对象
     client_accept_language = request.headers.get("Accept-Language")
@@ -196,91 +335,57 @@ async def chat_completions(request: Request, chat_request: ChatRequest) -> Union
         logger.debug("Client Accept-Language: {}", client_accept_language)
     
     try:
-        models_data = await get_models(access_token=access_token, use_cache=True)
-        allowed_model_ids = [model["id"] for model in models_data.get("data", [])]
+        # 通常直接使用内存中的模型列表缓存，仅首次加载时需等待模型列表
+        allowed_model_ids = await _load_allowed_model_ids(access_token)
         
         if not allowed_model_ids:
             logger.warning("No models from upstream, using config defaults")
-            allowed_model_ids = [model["id"] for model in settings.ALLOWED_MODELS]
+            allowed_model_ids = _DEFAULT_ALLOWED_IDS
     except Exception as e:
         logger.warning("Failed to fetch models for validation, using config defaults: error={}", str(e))
-        allowed_model_ids = [model["id"] for model in settings.ALLOWED_MODELS]
+        allowed_model_ids = _DEFAULT_ALLOWED_IDS
     
     if chat_request.model not in allowed_model_ids:
-        allowed_models = ", ".join(allowed_model_ids)
+        if allowed_model_ids is _DEFAULT_ALLOWED_IDS:
+            allowed_models = _DEFAULT_ALLOWED_IDS_STR
+        else:
+            allowed_models = ", ".join(sorted(allowed_model_ids))
         logger.warning(
             "Invalid model requested: requested_model={}, allowed_models={}",
             chat_request.model,
             allowed_models,
         )
-        return Response(
-            status_code=400,
-            content=json.dumps({
-                "error": {
-                    "message": f"Model {chat_request.model} is not allowed. Allowed models are: {allowed_models}",
-                    "type": "invalid_request_error",
-                    "code": 400,
-                }
-            }),
-            media_type="application/json",
+        return _error_response(
+            400,
+            f"Model {chat_request.model} is not allowed. Allowed models are: {allowed_models}",
+            "invalid_request_error",
         )
     
-    logger.info(
-        "Chat request received: model={}, stream={}, message_count={}, api_key={}",
-        chat_request.model,
-        chat_request.stream,
-        len(chat_request.messages),
-        access_token,
-    )
+    if is_level_enabled("INFO"):
+        logger.info(
+            "Chat request received: model={}, stream={}, message_count={}, api_key={}",
+            chat_request.model,
+            chat_request.stream,
+            len(chat_request.messages),
+            # 令牌预览在调用处直接格式化，不做缓存，避免原始令牌常驻内存
+            f"{access_token[:8]}...(len={len(access_token)})",
+        )
 
     try:
         if chat_request.stream:
             logger.debug("Processing streaming request")
-            stream_generator = process_streaming_response(chat_request, access_token)
-            
-            # 预先获取第一个数据块以便在流式传输前检测错误
-            try:
-                first_chunk = await anext(stream_generator)
-            except UpstreamAPIError as e:
-                logger.error(
-                    "Upstream API error before streaming: status_code={}, error_message={}, error_type={}, model={}",
-                    e.status_code,
-                    e.message,
-                    e.error_type,
-                    chat_request.model,
-                )
-                error_response = ErrorResponse(
-                    error=ErrorDetail(
-                        message=e.message,
-                        type=e.error_type,
-                        code=e.status_code
-                    )
-                )
-                return Response(
-                    status_code=e.status_code,
-                    content=error_response.model_dump_json(),
-                    media_type="application/json",
-                )
-            
-            async def stream_with_first_chunk() -> AsyncGenerator[str, None]:
-                yield first_chunk
-                async for chunk in stream_generator:
-                    yield chunk
             
+            # 上游错误由流式处理器转换为 SSE 错误事件，生成器直接交给 StreamingResponse，
+            # 无需预先等待首块；数据块已编码为 bytes，无需逐块再编码
             return StreamingResponse(
-                stream_with_first_chunk(),
+                process_streaming_response(chat_request, access_token),
                 media_type="text/event-stream",
-                headers={
-                    "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                    "Transfer-Encoding": "chunked",
-                },
+                headers=_SSE_HEADERS,
             )
         else:
             logger.debug("Processing non-streaming request")
             non_streaming_result = await process_non_streaming_response(chat_request, access_token)
-            # 直接返回字典，让 FastAPI 自动序列化为 JSON
-            return non_streaming_result
+            return _json_response(non_streaming_result)
     except UpstreamAPIError as e:
         logger.error(
             "Upstream API error in route: status_code={}, error_message={}, error_type={}, model={}",
@@ -289,15 +394,4 @@ async def chat_completions(request: Request, chat_request: ChatRequest) -> Union
             e.error_type,
             chat_request.model,
         )
-        error_response = ErrorResponse(
-            error=ErrorDetail(
-                message=e.message,
-                type=e.error_type,
-                code=e.status_code
-            )
-        )
-        return Response(
-            status_code=e.status_code,
-            content=error_response.model_dump_json(),
-            media_type="application/json",
-        )
+        return _error_response(e.status_code, e.message, e.error_type)
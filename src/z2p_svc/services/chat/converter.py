@@ -4,8 +4,6 @@
 处理文本消息、图片 URL、文件 URL 和多模态内容。
 """
 
-from typing import Any
-
 from ...models import Message, ConvertedMessages
 
 
@@ -20,6 +18,8 @@ def convert_messages(messages: list[Message]) -> ConvertedMessages:
     - 图片 URL（``image_url`` 类型）
     - 文件 URL（``file`` 类型）
 
+    ``content`` 为 ``None`` 的消息（如仅含工具调用的 assistant 消息）会被跳过。
+
     :param messages: OpenAI 格式的消息列表
     :type messages: list[Message]
     :return: 转换后的消息和提取的文件 URL
@@ -42,22 +42,42 @@ def convert_messages(messages: list[Message]) -> ConvertedMessages:
        # result.file_urls: ["data:image/png;base64,..."]
        # result.last_user_message_text: "图片内容"
     """
-    trans_messages = []
-    file_urls = []
+    # 常见情况是全部为纯文本消息：直接用推导式构建，跳过逐条的类型分派
+    if all(isinstance(message.content, str) for message in messages):
+        return ConvertedMessages.model_construct(
+            messages=[{"role": message.role, "content": message.content} for message in messages],
+            file_urls=[],
+            last_user_message_text=next(
+                (message.content for message in reversed(messages) if message.role == "user"), ""
+            ),
+        )
+
+    trans_messages: list[dict] = []
+    file_urls: list[str] = []
     last_user_message_text = ""
+    # 循环内频繁调用的方法绑定为局部变量
+    append_message = trans_messages.append
+    append_file_url = file_urls.append
 
     for message in messages:
         role = message.role
         content = message.content
 
         if isinstance(content, str):
-            trans_messages.append({"role": role, "content": content})
+            append_message({"role": role, "content": content})
             if role == "user":
                 last_user_message_text = content
         elif isinstance(content, list):
+            # 仅含一个文本片段的多模态内容最常见，按字符串内容处理，跳过逐片段分派
+            if len(content) == 1 and content[0].get("type") == "text":
+                text_content = content[0].get("text", "")
+                if text_content:
+                    append_message({"role": role, "content": text_content})
+                    if role == "user":
+                        last_user_message_text = text_content
+                continue
+
             text_content = ""
-            dont_append = False
-            new_message: dict[str, Any] = {"role": role}
 
             for part in content:
                 part_type = part.get("type")
@@ -68,20 +88,21 @@ def convert_messages(messages: list[Message]) -> ConvertedMessages:
                 elif part_type == "image_url":
                     file_url = part.get("image_url", {}).get("url", "")
                     if file_url:
-                        file_urls.append(file_url)
+                        append_file_url(file_url)
 
                 elif part_type == "file":
                     file_url = part.get("url", "")
                     if file_url:
-                        file_urls.append(file_url)
+                        append_file_url(file_url)
 
             if text_content and role == "user":
                 last_user_message_text = text_content
 
-            if not dont_append and text_content:
-                trans_messages.append({"role": role, "content": text_content})
+            if text_content:
+                append_message({"role": role, "content": text_content})
 
-    return ConvertedMessages(
+    # 字段均在此处按声明类型构建，跳过对整个消息列表的重复校验
+    return ConvertedMessages.model_construct(
         messages=trans_messages,
         file_urls=file_urls,
         last_user_message_text=last_user_message_text,
@@ -3,39 +3,39 @@
 本模块负责处理与上游API的非流式交互，包括非流式响应解析和结果构建。
 """
 
-from datetime import datetime
+import time
 from typing import Any
 
-from curl_cffi.requests import AsyncSession
-
 # 尝试使用 orjson 加速 JSON 操作
 try:
     import orjson
 
-    def json_loads(s: str) -> dict:
-        """使用 orjson 快速反序列化"""
-        return orjson.loads(s)
+    # 直接绑定 orjson.loads，省去一层 Python 包装调用；可直接解析 bytes
+    json_loads = orjson.loads
 except ImportError:
     import json
 
     json_loads = json.loads
 
+from curl_cffi.requests.exceptions import HTTPError, RequestException
+
 from ...config import get_settings
 from ...exceptions import UpstreamAPIError
-from ...logger import get_logger, json_str as log_json
-from ...models import (
-    ChatRequest,
-    ChatCompletionMessage,
-    ChatCompletionChoice,
-    ChatCompletionResponse,
-    ChatCompletionUsage,
-)
+from ...logger import get_logger, is_level_enabled, json_str as log_json
+from ...models import ChatRequest, ChatCompletionUsage
 from ...utils.error_handler import handle_upstream_error
+from ...utils.http_session import get_shared_session
 from ...utils.uuid_helper import generate_completion_id
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+# 非流式响应 usage 中保留的字段
+_USAGE_FIELDS = tuple(ChatCompletionUsage.model_fields)
+
+# 帧缺少 data 字段时使用的只读空字典，避免每行都新建默认值
+_EMPTY_DATA: dict[str, Any] = {}
+
 
 async def process_non_streaming_response(
     chat_request: ChatRequest, access_token: str, prepare_request_data_func
@@ -51,65 +51,74 @@ async def process_non_streaming_response(
     .. note::
        响应格式遵循OpenAI的非流式API规范。
     """
-    async with AsyncSession(impersonate=settings.get_browser_version()) as session:  # type: ignore
-        # 准备请求数据，先不传入 user_agent（使用空字符串占位）
-        zai_data, params, headers = await prepare_request_data_func(
-            chat_request, access_token, streaming=False, user_agent=""
-        )
-        
-        # 从 curl_cffi session 获取实际的 User-Agent
-        # impersonate 参数会自动设置对应浏览器的 User-Agent
-        # 使用 type: ignore 来忽略 Pylance 的类型检查警告
-        actual_user_agent = ""
-        try:
-            if hasattr(session, 'headers') and 'User-Agent' in session.headers:
-                actual_user_agent = session.headers['User-Agent']  # type: ignore
-        except Exception:
-            pass
-        
-        # 更新 params 中的 user_agent
-        if actual_user_agent:
-            params["user_agent"] = actual_user_agent
-
-        full_response = ""
-        usage_info = None
-        request_id = params.get("requestId", "unknown")
-        user_id = params.get("user_id", "unknown")
-        timestamp = params.get("timestamp", "unknown")
-
-        logger.info(
-            "Non-streaming request initiated: request_id={}, user_id={}, model={}, upstream_url={}",
+    # 复用共享会话，避免每个请求重新建立连接池和 TLS 握手；响应在 finally 中关闭
+    session = get_shared_session(settings.get_browser_version())
+    # 准备请求数据，先不传入 user_agent（使用空字符串占位）
+    zai_data, params, headers = await prepare_request_data_func(
+        chat_request, access_token, streaming=False, user_agent=""
+    )
+    
+    # 从 curl_cffi session 获取实际的 User-Agent
+    # impersonate 参数会自动设置对应浏览器的 User-Agent
+    # 使用 type: ignore 来忽略 Pylance 的类型检查警告
+    actual_user_agent = ""
+    try:
+        if hasattr(session, 'headers') and 'User-Agent' in session.headers:
+            actual_user_agent = session.headers['User-Agent']  # type: ignore
+    except Exception:
+        pass
+    
+    # 更新 params 中的 user_agent
+    if actual_user_agent:
+        params["user_agent"] = actual_user_agent
+
+    # 内容片段先收集到列表，结束后一次拼接，避免逐块 += 的重复拷贝
+    response_parts: list[str] = []
+    usage_info = None
+    request_id = params.get("requestId", "unknown")
+    user_id = params.get("user_id", "unknown")
+    timestamp = params.get("timestamp", "unknown")
+
+    # 逐帧循环中频繁读取的配置提前绑定为局部变量
+    verbose_logging = settings.verbose_logging
+    upstream_url = f"{settings.proxy_url}/api/chat/completions"
+
+    logger.info(
+        "Non-streaming request initiated: request_id={}, user_id={}, model={}, upstream_url={}",
+        request_id,
+        user_id,
+        chat_request.model,
+        upstream_url,
+    )
+
+    # 请求体可能很大，仅在 DEBUG 日志实际输出时才复制并序列化
+    if verbose_logging and is_level_enabled("DEBUG"):
+        # 为日志创建数据副本，移除 model_item 以避免污染日志
+        log_data = {k: v for k, v in zai_data.items() if k != "model_item"}
+        logger.debug(
+            "Non-streaming request details: request_id={}, upstream_url={}, headers={}, params={}, json_body={}",
             request_id,
-            user_id,
-            chat_request.model,
-            f"{settings.proxy_url}/api/chat/completions",
+            upstream_url,
+            log_json({
+                k: v if k.lower() != "authorization" else v[:20] + "..."
+                for k, v in headers.items()
+            }),
+            log_json(params),
+            log_json(log_data),
         )
 
-        if settings.verbose_logging:
-            # 为日志创建数据副本，移除 model_item 以避免污染日志
-            log_data = {k: v for k, v in zai_data.items() if k != "model_item"}
-            logger.debug(
-                "Non-streaming request details: request_id={}, upstream_url={}, headers={}, params={}, json_body={}",
-                request_id,
-                f"{settings.proxy_url}/api/chat/completions",
-                log_json({
-                    k: v if k.lower() != "authorization" else v[:20] + "..."
-                    for k, v in headers.items()
-                }),
-                log_json(params),
-                log_json(log_data),
-            )
-
+    try:
+        response = await session.post(
+            upstream_url,
+            headers=headers,
+            params=params,
+            json=zai_data,
+            timeout=float(settings.timeout_chat),
+            stream=True,  # 接收SSE流，收到 done/错误帧后即可提前结束传输
+        )
+        
+        # 状态码检查也放在 try 内：上游返回错误时同样需要关闭流式响应，归还 curl 句柄
         try:
-            response = await session.post(
-                f"{settings.proxy_url}/api/chat/completions",
-                headers=headers,
-                params=params,
-                json=zai_data,
-                timeout=float(settings.timeout_chat),
-                stream=True,  # 接收SSE流
-            )
-            
             if response.status_code != 200:
                 await handle_upstream_error(
                     response,
@@ -127,133 +136,145 @@ async def process_non_streaming_response(
                 chat_request.model,
             )
 
-            # 伪非流式：接收SSE流并聚合
-            try:
-                async for line in response.aiter_lines():
-                    if not line:
-                        continue
-
-                    if isinstance(line, bytes):
-                        line = line.decode("utf-8")
-
-                    if not line.startswith("data:"):
-                        continue
-
-                    json_str = line[6:].strip()
-
-                    if settings.verbose_logging:
-                        logger.debug(
-                            "Non-streaming SSE line: request_id={}, data={}",
-                            request_id,
-                            json_str[:300],
-                        )
-
-                    try:
-                        json_object = json_loads(json_str)
-                    except Exception:
-                        continue
-
-                    if json_object.get("type") != "chat:completion":
-                        continue
-
-                    data = json_object.get("data", {})
-
-                    # 检查是否有错误（如内容安全警告）
-                    error_info = data.get("error")
-                    if error_info:
-                        error_detail = error_info.get("detail", "Unknown error")
-                        logger.warning(
-                            "Content security warning: request_id={}, detail={}",
-                            request_id,
-                            error_detail
-                        )
-                        # 将错误信息添加到响应中
-                        full_response += f"\n\n[Error: {error_detail}]"
-                        break
-
-                    # 提取usage信息（可能在任何阶段出现）
-                    if data.get("usage"):
-                        usage_info = data["usage"]
-
-                    # 聚合answer和other阶段的内容
-                    phase = data.get("phase")
-                    if phase in ("answer", "other"):
-                        content = data.get("delta_content") or data.get("edit_content", "")
-                        if content:
-                            full_response += content
-
-                    # 检查done标记
-                    if phase == "done":
-                        logger.info(
-                            "Non-streaming done signal received: request_id={}, model={}",
-                            request_id,
-                            chat_request.model,
-                        )
-                        break
-
-            finally:
-                await response.aclose()
-
-            # 构建完整OpenAI格式响应
-            message = ChatCompletionMessage(role="assistant", content=full_response)
-            choice = ChatCompletionChoice(index=0, message=message, finish_reason="stop")
-
-            response_obj = ChatCompletionResponse(
-                id=generate_completion_id(),
-                created=int(datetime.now().timestamp()),
-                model=chat_request.model,
-                choices=[choice],
-                usage=ChatCompletionUsage(**usage_info) if usage_info else None,
-            )
+            # 伪非流式：接收SSE流并聚合；收到 done 或错误帧后立即 break 并关闭响应，
+            # 不必等待上游关闭连接，也不会在内存中缓冲完整的SSE响应体
+            async for line in response.aiter_lines():
+                # curl_cffi 逐行返回 bytes，orjson 直接解析 bytes（自动忽略首尾空白），无需先解码为 str
+                if not line.startswith(b"data:"):
+                    continue
+
+                # 仅聚合 chat:completion 帧；心跳等其他帧不含该字面量，跳过解析。
+                # 这只是预过滤，解析后仍会校验 type 字段
+                if b'"chat:completion"' not in line:
+                    continue
+
+                # "data:" 后的单个可选空格由 JSON 解析器作为空白忽略，兼容有无空格两种写法
+                json_str = line[5:]
+
+                if verbose_logging:
+                    logger.debug(
+                        "Non-streaming SSE line: request_id={}, data={}",
+                        request_id,
+                        json_str[:300].decode("utf-8", "replace"),
+                    )
+
+                try:
+                    json_object = json_loads(json_str)
+                except ValueError:
+                    continue
+
+                if json_object.get("type") != "chat:completion":
+                    continue
+
+                data = json_object.get("data", _EMPTY_DATA)
+
+                # 检查是否有错误（如内容安全警告）
+                error_info = data.get("error")
+                if error_info:
+                    error_detail = error_info.get("detail", "Unknown error")
+                    logger.warning(
+                        "Content security warning: request_id={}, detail={}",
+                        request_id,
+                        error_detail
+                    )
+                    # 将错误信息添加到响应中
+                    response_parts.append(f"\n\n[Error: {error_detail}]")
+                    break
+
+                # 提取usage信息（可能在任何阶段出现）
+                if data.get("usage"):
+                    usage_info = data["usage"]
+
+                # 聚合answer和other阶段的内容
+                phase = data.get("phase")
+                if phase in ("answer", "other"):
+                    content = data.get("delta_content") or data.get("edit_content", "")
+                    if content:
+                        response_parts.append(content)
+
+                # 检查done标记
+                if phase == "done":
+                    logger.info(
+                        "Non-streaming done signal received: request_id={}, model={}",
+                        request_id,
+                        chat_request.model,
+                    )
+                    break
+
+        finally:
+            await response.aclose()
+
+        full_response = "".join(response_parts)
+
+        # 直接构建 OpenAI 格式响应字典（结构同 ChatCompletionResponse），
+        # 省去 Pydantic 模型校验后再 model_dump 的往返
+        result: dict[str, Any] = {
+            "id": generate_completion_id(),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": chat_request.model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": full_response},
+                    "finish_reason": "stop",
+                }
+            ],
+        }
+        if usage_info:
+            # 只保留 ChatCompletionUsage 声明的非空字段
+            result["usage"] = {
+                key: usage_info[key] for key in _USAGE_FIELDS if usage_info.get(key) is not None
+            }
 
-            logger.info(
-                "Non-streaming response completed: request_id={}, model={}, content_length={}",
-                request_id,
-                chat_request.model,
-                len(full_response),
-            )
+        logger.info(
+            "Non-streaming response completed: request_id={}, model={}, content_length={}",
+            request_id,
+            chat_request.model,
+            len(full_response),
+        )
 
-            return response_obj.model_dump(exclude_none=True)
-            
-        except UpstreamAPIError:
-            raise
-        except Exception as e:
-            if "status" in str(type(e).__name__).lower() or "HTTP" in str(e):
-                status_code = getattr(e, "status_code", 500)
-                logger.error(
-                    "Unexpected HTTP status error (non-streaming): status_code={}, error={}, request_id={}, user_id={}, timestamp={}",
-                    status_code,
-                    str(e),
-                    request_id,
-                    user_id,
-                    timestamp,
-                )
-                raise UpstreamAPIError(
-                    status_code,
-                    f"HTTP错误 {status_code}",
-                    "http_error",
-                ) from e
-            elif "request" in str(type(e).__name__).lower():
-                logger.error(
-                    "Upstream request error (non-streaming): error_type={}, error={}, request_id={}, user_id={}, timestamp={}",
-                    type(e).__name__,
-                    str(e),
-                    request_id,
-                    user_id,
-                    timestamp,
-                )
-                raise UpstreamAPIError(
-                    500, f"请求错误: {str(e)}", "request_error"
-                ) from e
-            else:
-                logger.error(
-                    "Unexpected error (non-streaming): error_type={}, error={}, request_id={}, user_id={}, timestamp={}",
-                    type(e).__name__,
-                    str(e),
-                    request_id,
-                    user_id,
-                    timestamp,
-                )
-                raise UpstreamAPIError(
-                    500, f"未知错误: {str(e)}", "unknown_error"
-                ) from e
\ No newline at end of file
+        return result
+        
+    except UpstreamAPIError:
+        raise
+    except HTTPError as e:
+        # 按 curl_cffi 异常类型分类，不再对异常名和消息做字符串匹配
+        status_code = getattr(e.response, "status_code", None) or 500
+        logger.error(
+            "Unexpected HTTP status error (non-streaming): status_code={}, error={}, request_id={}, user_id={}, timestamp={}",
+            status_code,
+            str(e),
+            request_id,
+            user_id,
+            timestamp,
+        )
+        raise UpstreamAPIError(
+            status_code,
+            f"HTTP错误 {status_code}",
+            "http_error",
+        ) from e
+    except RequestException as e:
+        logger.error(
+            "Upstream request error (non-streaming): error_type={}, error={}, request_id={}, user_id={}, timestamp={}",
+            type(e).__name__,
+            str(e),
+            request_id,
+            user_id,
+            timestamp,
+        )
+        raise UpstreamAPIError(
+            500, f"请求错误: {str(e)}", "request_error"
+        ) from e
+    except Exception as e:
+        logger.error(
+            "Unexpected error (non-streaming): error_type={}, error={}, request_id={}, user_id={}, timestamp={}",
+            type(e).__name__,
+            str(e),
+            request_id,
+            user_id,
+            timestamp,
+        )
+        raise UpstreamAPIError(
+            500, f"未知错误: {str(e)}", "unknown_error"
+        ) from e
\ No newline at end of file
@@ -5,52 +5,56 @@
 
 import re
 import time
-from datetime import datetime, UTC
 from typing import Any, AsyncGenerator
 
-from curl_cffi.requests import AsyncSession
-
 # 尝试使用 orjson 加速 JSON 操作
 try:
     import orjson
 
-    def json_dumps(obj: dict) -> str:
-        """使用 orjson 快速序列化"""
-        return orjson.dumps(obj).decode("utf-8")
+    # 直接绑定 orjson.loads，省去一层 Python 包装调用；可直接解析 bytes
+    json_loads = orjson.loads
 
-    def json_loads(s: str) -> dict:
-        """使用 orjson 快速反序列化"""
-        return orjson.loads(s)
+    def sse_data(obj: dict) -> bytes:
+        """序列化为 SSE ``data:`` 帧（直接拼接 orjson 输出的 bytes）"""
+        return b"data: " + orjson.dumps(obj) + b"\n\n"
 except ImportError:
     import json
 
-    json_dumps = json.dumps
     json_loads = json.loads
 
+    def sse_data(obj: dict) -> bytes:
+        """序列化为 SSE ``data:`` 帧"""
+        return f"data: {json.dumps(obj)}\n\n".encode("utf-8")
+
+from curl_cffi.requests.exceptions import HTTPError, RequestException
+
 from ...config import get_settings
 from ...exceptions import UpstreamAPIError
-from ...logger import get_logger, json_str as log_json
-from ...models import (
-    ChatRequest,
-    ChatCompletionChunk,
-    ChatCompletionUsage,
-    ChatCompletionChunkChoice,
-    ChatCompletionChunkDelta,
-)
+from ...logger import get_logger, is_level_enabled, json_str as log_json
+from ...models import ChatRequest
 from ...utils.error_handler import handle_upstream_error
+from ...utils.http_session import get_shared_session
 from ...utils.uuid_helper import generate_completion_id
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+# 思考块结束标记：只取最后一个标记之后的内容，用 str.rpartition 截取，无需构建分割列表
+SUMMARY_END = "</summary>\n"
+DETAILS_END = "</details>"
+
 # 预编译正则表达式（避免每次都编译，提升性能）
-SUMMARY_PATTERN = re.compile(r"</summary>\n")
-DETAILS_PATTERN = re.compile(r"</details>")
 GLM_BLOCK_START_PATTERN = re.compile(
     r'\n*<glm_block[^>]*>{"type": "mcp", "data": {"metadata": {'
 )
 GLM_BLOCK_END_PATTERN = re.compile(r'", "result": "".*</glm_block>')
 
+# SSE 结束帧
+SSE_DONE = b"data: [DONE]\n\n"
+
+# 帧缺少 data 字段时使用的只读空字典，避免每行都新建默认值
+_EMPTY_DATA: dict[str, Any] = {}
+
 
 def create_chat_completion_chunk(
     content: str,
@@ -104,7 +108,7 @@ def create_error_chunk(
     error_type: str,
     model: str,
     status_code: int | None = None,
-) -> str:
+) -> bytes:
     """创建错误响应块。
 
     :param error_message: 错误消息
@@ -116,7 +120,7 @@ def create_error_chunk(
     error_data = {
         "id": generate_completion_id(),
         "object": "chat.completion.chunk",
-        "created": int(datetime.now(UTC).timestamp()),
+        "created": int(time.time()),
         "model": model,
         "choices": [
             {
@@ -131,30 +135,35 @@ def create_error_chunk(
             "code": status_code,
         },
     }
-    return f"data: {json_dumps(error_data)}\n\n"
+    return sse_data(error_data)
 
 
 async def process_streaming_response(
     chat_request: ChatRequest, access_token: str, prepare_request_data_func, enable_toolify: bool = False
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """处理流式响应。
 
     :param chat_request: 聊天请求对象
     :param access_token: 访问令牌
     :param prepare_request_data_func: 用于准备请求数据的函数
     :param enable_toolify: 是否启用 toolify 模式
-    :yields: SSE格式的数据块
-    :raises UpstreamAPIError: 当上游API返回错误状态码时
+    :yields: SSE格式的数据块（已编码为 UTF-8 bytes）
 
     .. note::
        响应格式遵循OpenAI的流式API规范。
+
+    .. note::
+       生成器直接交给 ``StreamingResponse``，上游错误（包括返回错误状态码）
+       不再向外抛出，而是以 OpenAI 格式的 SSE 错误事件加 ``[DONE]`` 结束流。
     """
-    async with AsyncSession(impersonate=settings.get_browser_version()) as session:  # type: ignore
+    try:
+        # 复用共享会话，避免每个请求重新建立连接池和 TLS 握手；响应在 finally 中关闭
+        session = get_shared_session(settings.get_browser_version())
         # 准备请求数据，先不传入 user_agent（使用空字符串占位）
         zai_data, params, headers = await prepare_request_data_func(
             chat_request, access_token, user_agent=""
         )
-        
+    
         # 从 curl_cffi session 获取实际的 User-Agent
         # impersonate 参数会自动设置对应浏览器的 User-Agent
         # 使用 type: ignore 来忽略 Pylance 的类型检查警告
@@ -164,7 +173,7 @@ async def process_streaming_response(
                 actual_user_agent = session.headers['User-Agent']  # type: ignore
         except Exception:
             pass
-        
+    
         # 更新 params 中的 user_agent
         if actual_user_agent:
             params["user_agent"] = actual_user_agent
@@ -173,21 +182,26 @@ async def process_streaming_response(
         user_id = params.get("user_id", "unknown")
         timestamp = params.get("timestamp", "unknown")
 
+        # 逐帧循环中频繁读取的配置提前绑定为局部变量
+        verbose_logging = settings.verbose_logging
+        upstream_url = f"{settings.proxy_url}/api/chat/completions"
+
         logger.info(
             "Streaming request initiated: request_id={}, user_id={}, model={}, upstream_url={}",
             request_id,
             user_id,
             chat_request.model,
-            f"{settings.proxy_url}/api/chat/completions",
+            upstream_url,
         )
 
-        if settings.verbose_logging:
+        # 请求体可能很大，仅在 DEBUG 日志实际输出时才复制并序列化
+        if verbose_logging and is_level_enabled("DEBUG"):
             # 为日志创建数据副本，移除 model_item 以避免污染日志
             log_data = {k: v for k, v in zai_data.items() if k != "model_item"}
             logger.debug(
                 "Streaming request details: request_id={}, upstream_url={}, headers={}, params={}, json_body={}",
                 request_id,
-                f"{settings.proxy_url}/api/chat/completions",
+                upstream_url,
                 log_json({
                     k: v if k.lower() != "authorization" else v[:20] + "..."
                     for k, v in headers.items()
@@ -198,7 +212,7 @@ async def process_streaming_response(
 
         try:
             response = await session.post(
-                f"{settings.proxy_url}/api/chat/completions",
+                upstream_url,
                 headers=headers,
                 params=params,
                 json=zai_data,
@@ -224,10 +238,15 @@ async def process_streaming_response(
                 )
 
                 # 预创建资源以提升性能
-                timestamp = int(datetime.now().timestamp())
+                timestamp = int(time.time())
                 chunk_id = generate_completion_id()
                 chunk_count = 0
-                
+
+                # 每个请求复用同一个数据块模板，热路径只替换 delta；
+                # sse_data 会在下一次修改前同步完成序列化，因此复用是安全的
+                chunk_template = create_chat_completion_chunk("", chat_request.model, timestamp, "answer", chunk_id)
+                chunk_choice = chunk_template["choices"][0]
+            
                 # 初始化 toolify 检测器
                 detector = None
                 if enable_toolify:
@@ -243,25 +262,22 @@ async def process_streaming_response(
                 PHASE_LOG_INTERVAL = 32
 
                 async for line in response.aiter_lines():
-                    if not line:
-                        continue
-
-                    # curl_cffi返回bytes，需要解码
-                    if isinstance(line, bytes):
-                        line = line.decode("utf-8")
-
-                    if not line.startswith("data:"):
+                    # curl_cffi 逐行返回 bytes，orjson 直接解析 bytes，无需先解码为 str
+                    if not line.startswith(b"data:"):
                         continue
 
-                    json_str = line[6:]
+                    # "data:" 后的单个可选空格由 JSON 解析器作为空白忽略，兼容有无空格两种写法
+                    json_str = line[5:]
 
+                    # SSE 允许非 JSON 的 data 行（如心跳），直接跳过；仅在详细日志模式下记录
                     try:
                         json_object = json_loads(json_str)
-                    except Exception:
-                        logger.warning("Invalid JSON in stream: line={}", line[:100])
+                    except ValueError:
+                        if verbose_logging:
+                            logger.debug("Non-JSON line in stream: line={}", line[:100].decode("utf-8", "replace"))
                         continue
 
-                    data = json_object.get("data", {})
+                    data = json_object.get("data", _EMPTY_DATA)
 
                     # 检查是否有错误（如内容安全警告）
                     error_info = data.get("error")
@@ -284,14 +300,14 @@ async def process_streaming_response(
                                 "finish_reason": "content_filter"
                             }]
                         }
-                        yield f"data: {json_dumps(error_chunk)}\n\n"
-                        yield "data: [DONE]\n\n"
+                        yield sse_data(error_chunk)
+                        yield SSE_DONE
                         break
 
                     phase = data.get("phase")
 
                     # verbose logging 合并逻辑
-                    if settings.verbose_logging and phase:
+                    if verbose_logging and phase:
                         if phase != last_phase and last_phase:
                             logger.debug(
                                 "Phase completed: phase={}, chunks={}, content_preview={}",
@@ -314,45 +330,49 @@ async def process_streaming_response(
 
                     if phase == "thinking":
                         content = data.get("delta_content", "")
-                        if "</summary>\n" in content:
-                            content = SUMMARY_PATTERN.split(content)[-1]
+                        content = content.rpartition(SUMMARY_END)[2]
                         chunk_count += 1
-                        if settings.verbose_logging:
+                        if verbose_logging:
                             phase_chunk_count += 1
                             phase_content_buffer += content
-                        yield f"data: {json_dumps(create_chat_completion_chunk(content, chat_request.model, timestamp, 'thinking', chunk_id))}\n\n"
+                        chunk_choice["delta"] = {"role": "assistant", "reasoning_content": content}
+                        yield sse_data(chunk_template)
 
                     elif phase == "answer":
                         content = data.get("delta_content") or data.get("edit_content", "")
-                        # 使用预编译正则快速清理
-                        if "</details>" in content:
-                            content = DETAILS_PATTERN.split(content)[-1]
-                        
+                        content = content.rpartition(DETAILS_END)[2]
+                    
                         # 如果启用了 toolify，使用检测器处理内容
                         if detector:
                             is_tool, output_content = detector.process_chunk(content)
                             if output_content:
                                 chunk_count += 1
-                                if settings.verbose_logging:
+                                if verbose_logging:
                                     phase_chunk_count += 1
                                     phase_content_buffer += output_content
-                                yield f"data: {json_dumps(create_chat_completion_chunk(output_content, chat_request.model, timestamp, 'answer', chunk_id))}\n\n"
+                                chunk_choice["delta"] = {"role": "assistant", "content": output_content}
+                                yield sse_data(chunk_template)
                         else:
                             chunk_count += 1
-                            if settings.verbose_logging:
+                            if verbose_logging:
                                 phase_chunk_count += 1
                                 phase_content_buffer += content
-                            yield f"data: {json_dumps(create_chat_completion_chunk(content, chat_request.model, timestamp, 'answer', chunk_id))}\n\n"
+                            chunk_choice["delta"] = {"role": "assistant", "content": content}
+                            yield sse_data(chunk_template)
 
                     elif phase == "tool_call":
                         content = data.get("delta_content") or data.get("edit_content", "")
-                        content = GLM_BLOCK_START_PATTERN.sub("{", content)
-                        content = GLM_BLOCK_END_PATTERN.sub("", content)
+                        # 大多数增量不含 glm_block 标记，先用子串检查再进入正则引擎
+                        if "<glm_block" in content:
+                            content = GLM_BLOCK_START_PATTERN.sub("{", content)
+                        if "</glm_block>" in content:
+                            content = GLM_BLOCK_END_PATTERN.sub("", content)
                         chunk_count += 1
-                        if settings.verbose_logging:
+                        if verbose_logging:
                             phase_chunk_count += 1
                             phase_content_buffer += content
-                        yield f"data: {json_dumps(create_chat_completion_chunk(content, chat_request.model, timestamp, 'tool_call', chunk_id))}\n\n"
+                        chunk_choice["delta"] = {"role": "assistant", "content": content}
+                        yield sse_data(chunk_template)
 
                     elif phase == "other":
                         usage = data.get("usage", {})
@@ -364,24 +384,25 @@ async def process_streaming_response(
                             chunk_count,
                             log_json(usage),
                         )
-                        if settings.verbose_logging and content:
+                        if verbose_logging and content:
                             phase_chunk_count += 1
                             phase_content_buffer += content
                         if content or usage:
-                            yield f"data: {json_dumps(create_chat_completion_chunk(content, chat_request.model, timestamp, 'other', chunk_id, usage, 'stop'))}\n\n"
+                            yield sse_data(create_chat_completion_chunk(content, chat_request.model, timestamp, 'other', chunk_id, usage, 'stop'))
 
                     elif phase == "done":
                         # 如果启用了 toolify，finalize 检测器
                         if detector:
                             parsed_tools, remaining = detector.finalize()
                             if remaining:
-                                yield f"data: {json_dumps(create_chat_completion_chunk(remaining, chat_request.model, timestamp, 'answer', chunk_id))}\n\n"
-                            
+                                chunk_choice["delta"] = {"role": "assistant", "content": remaining}
+                                yield sse_data(chunk_template)
+                        
                             if parsed_tools:
                                 # 转换为 OpenAI 格式并发送
                                 from ..toolify.parser import convert_to_openai_tool_calls
                                 tool_calls = convert_to_openai_tool_calls(parsed_tools)
-                                
+                            
                                 # 发送 tool_calls chunk
                                 tool_chunk = {
                                     "id": chunk_id,
@@ -394,11 +415,11 @@ async def process_streaming_response(
                                         "finish_reason": "tool_calls"
                                     }]
                                 }
-                                yield f"data: {json_dumps(tool_chunk)}\n\n"
+                                yield sse_data(tool_chunk)
                                 logger.info(f"[TOOLIFY] 发送了 {len(tool_calls)} 个工具调用")
-                        
+                    
                         # 输出最后一个 phase 的统计信息
-                        if settings.verbose_logging and last_phase and phase_chunk_count > 0:
+                        if verbose_logging and last_phase and phase_chunk_count > 0:
                             logger.debug(
                                 "Phase completed: phase={}, chunks={}, content_preview={}",
                                 last_phase,
@@ -412,50 +433,64 @@ async def process_streaming_response(
                             chat_request.model,
                             chunk_count,
                         )
-                        yield "data: [DONE]\n\n"
+                        yield SSE_DONE
                         break
 
             finally:
                 await response.aclose()
         except UpstreamAPIError:
             raise
+        except HTTPError as e:
+            # 按 curl_cffi 异常类型分类，不再对异常名和消息做字符串匹配
+            status_code = getattr(e.response, "status_code", None) or 500
+            logger.error(
+                "Unexpected HTTP status error: status_code={}, error={}, request_id={}, user_id={}, timestamp={}",
+                status_code,
+                str(e),
+                request_id,
+                user_id,
+                timestamp,
+            )
+            raise UpstreamAPIError(
+                status_code,
+                f"HTTP错误 {status_code}",
+                "http_error",
+            ) from e
+        except RequestException as e:
+            logger.error(
+                "Upstream request error: error_type={}, error={}, request_id={}, user_id={}, timestamp={}",
+                type(e).__name__,
+                str(e),
+                request_id,
+                user_id,
+                timestamp,
+            )
+            raise UpstreamAPIError(
+                500, f"请求错误: {str(e)}", "request_error"
+            ) from e
         except Exception as e:
-            if "status" in str(type(e).__name__).lower() or "HTTP" in str(e):
-                status_code = getattr(e, "status_code", 500)
-                logger.error(
-                    "Unexpected HTTP status error: status_code={}, error={}, request_id={}, user_id={}, timestamp={}",
-                    status_code,
-                    str(e),
-                    request_id,
-                    user_id,
-                    timestamp,
-                )
-                raise UpstreamAPIError(
-                    status_code,
-                    f"HTTP错误 {status_code}",
-                    "http_error",
-                ) from e
-            elif "request" in str(type(e).__name__).lower():
-                logger.error(
-                    "Upstream request error: error_type={}, error={}, request_id={}, user_id={}, timestamp={}",
-                    type(e).__name__,
-                    str(e),
-                    request_id,
-                    user_id,
-                    timestamp,
-                )
-                raise UpstreamAPIError(
-                    500, f"请求错误: {str(e)}", "request_error"
-                ) from e
-            else:
-                logger.error(
-                    "Unexpected error streaming: error_type={}, error={}, request_id={}, user_id={}, timestamp={}",
-                    type(e).__name__,
-                    str(e),
-                    request_id,
-                    user_id,
-                    timestamp,
-                )
-                raise UpstreamAPIError(
-                    500, f"未知错误: {str(e)}", "unknown_error"
-                ) from e
\ No newline at end of file
+            logger.error(
+                "Unexpected error streaming: error_type={}, error={}, request_id={}, user_id={}, timestamp={}",
+                type(e).__name__,
+                str(e),
+                request_id,
+                user_id,
+                timestamp,
+            )
+            raise UpstreamAPIError(
+                500, f"未知错误: {str(e)}", "unknown_error"
+            ) from e
+    except UpstreamAPIError as e:
+        # 响应头已发送给客户端，上游错误只能以 SSE 错误事件返回
+        yield create_error_chunk(e.message, e.error_type, chat_request.model, e.status_code)
+        yield SSE_DONE
+    except Exception as e:
+        logger.error(
+            "Streaming request failed: model={}, error_type={}, error={}",
+            chat_request.model,
+            type(e).__name__,
+            str(e),
+        )
+        # 内部异常的原始信息可能包含敏感细节，只写入日志，不返回给客户端
+        yield create_error_chunk("Internal server error", "server_error", chat_request.model, 500)
+        yield SSE_DONE
@@ -10,9 +10,10 @@ import threading
 import time
 import uuid
 from collections import OrderedDict
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from ...logger import get_logger
+from .parser import dump_tool_arguments
 
 logger = get_logger(__name__)
 
@@ -67,27 +68,41 @@ class ToolCallMappingManager:
         :param description: 工具描述
         """
         with self._lock:
-            current_time = time.time()
-            
-            if tool_call_id in self._data:
-                del self._data[tool_call_id]
-                del self._timestamps[tool_call_id]
+            self._store_locked(tool_call_id, name, args, description, time.time())
 
-            while len(self._data) >= self.max_size:
-                oldest_key = next(iter(self._data))
-                del self._data[oldest_key]
-                del self._timestamps[oldest_key]
-                logger.debug(f"[TOOLIFY] 因大小限制移除最旧条目: {oldest_key}")
-
-            self._data[tool_call_id] = {
-                "name": name,
-                "args": args,
-                "description": description,
-                "created_at": current_time
-            }
-            self._timestamps[tool_call_id] = current_time
-            
-            logger.debug(f"[TOOLIFY] 存储工具调用映射: {tool_call_id} -> {name}")
+    def store_many(self, entries: List[Tuple[str, str, dict]]) -> None:
+        """批量存储工具调用映射，整批只获取一次锁。
+        
+        :param entries: ``(tool_call_id, name, args)`` 三元组列表
+        """
+        if not entries:
+            return
+        with self._lock:
+            current_time = time.time()
+            for tool_call_id, name, args in entries:
+                self._store_locked(tool_call_id, name, args, "", current_time)
+
+    def _store_locked(self, tool_call_id: str, name: str, args: dict, description: str, current_time: float) -> None:
+        """在已持有锁的情况下写入一条映射。"""
+        if tool_call_id in self._data:
+            del self._data[tool_call_id]
+            del self._timestamps[tool_call_id]
+
+        while len(self._data) >= self.max_size:
+            oldest_key = next(iter(self._data))
+            del self._data[oldest_key]
+            del self._timestamps[oldest_key]
+            logger.debug(f"[TOOLIFY] 因大小限制移除最旧条目: {oldest_key}")
+
+        self._data[tool_call_id] = {
+            "name": name,
+            "args": args,
+            "description": description,
+            "created_at": current_time
+        }
+        self._timestamps[tool_call_id] = current_time
+        
+        logger.debug(f"[TOOLIFY] 存储工具调用映射: {tool_call_id} -> {name}")
 
     def get(self, tool_call_id: str) -> Optional[Dict[str, Any]]:
         """获取工具调用映射（更新LRU顺序）。
@@ -269,18 +284,21 @@ class ToolifyCore:
         :return: OpenAI格式的tool_calls列表
         """
         tool_calls = []
+        pending_mappings = []
         for tool in parsed_tools:
             tool_call_id = f"call_{uuid.uuid4().hex}"
-            self.store_tool_call_mapping(tool_call_id, tool["name"], tool["args"])
+            pending_mappings.append((tool_call_id, tool["name"], tool["args"]))
             tool_calls.append({
                 "id": tool_call_id,
                 "type": "function",
                 "function": {
                     "name": tool["name"],
-                    "arguments": json.dumps(tool["args"])
+                    "arguments": dump_tool_arguments(tool["args"])
                 }
             })
 
+        # 映射统一在循环结束后批量写入，只获取一次锁
+        self.mapping_manager.store_many(pending_mappings)
         logger.debug(f"[TOOLIFY] 转换了 {len(tool_calls)} 个工具调用")
         return tool_calls
 
@@ -7,6 +7,8 @@ import re
 import json
 from typing import List, Dict, Any, Optional
 
+import orjson
+
 from ...logger import get_logger
 
 logger = get_logger(__name__)
@@ -146,6 +148,21 @@ def parse_tool_calls_xml(xml_string: str, trigger_signal: str) -> Optional[List[
     return results if results else None
 
 
+def dump_tool_arguments(args: Any) -> str:
+    """将工具调用参数序列化为 JSON 字符串。
+    
+    优先使用 orjson（紧凑格式、直接输出 UTF-8）；orjson 不支持的参数
+    （非字符串字典键、超出 64 位的整数等）回退到标准库 json。
+    
+    :param args: 工具调用参数
+    :return: JSON 字符串
+    """
+    try:
+        return orjson.dumps(args).decode()
+    except TypeError:
+        return json.dumps(args, ensure_ascii=False)
+
+
 def convert_to_openai_tool_calls(parsed_tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """将解析的工具调用转换为 OpenAI 格式。
     
@@ -161,7 +178,7 @@ def convert_to_openai_tool_calls(parsed_tools: List[Dict[str, Any]]) -> List[Dic
             "type": "function",
             "function": {
                 "name": tool["name"],
-                "arguments": json.dumps(tool["args"], ensure_ascii=False)
+                "arguments": dump_tool_arguments(tool["args"])
             }
         })
     
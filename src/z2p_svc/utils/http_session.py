@@ -0,0 +1,108 @@
+"""共享 HTTP 会话模块。
+
+按浏览器指纹复用 curl_cffi ``AsyncSession``，避免每次请求重新建立连接池和 TLS 握手。
+"""
+
+import asyncio
+
+from curl_cffi.curl import Curl
+from curl_cffi.requests import AsyncSession
+
+from ..config import get_settings
+from ..exceptions import UpstreamAPIError
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+class SharedAsyncSession(AsyncSession):
+    """等待空闲 curl 句柄有超时限制的共享会话。
+
+    curl_cffi 在连接池耗尽时会无限期等待空闲句柄；共享会话被所有请求共用，
+    因此超时后改为抛出 503，避免请求永久挂起。
+    """
+
+    async def pop_curl(self) -> Curl:
+        """从连接池获取 curl 句柄。
+
+        :return: 可用的 curl 句柄
+        :raises UpstreamAPIError: 等待超过 ``timeout_connection_pool`` 秒仍无空闲句柄时
+        """
+        try:
+            return await asyncio.wait_for(super().pop_curl(), timeout=settings.timeout_connection_pool)
+        except TimeoutError:
+            logger.warning(
+                "Upstream connection pool exhausted: max_connections={}",
+                settings.upstream_max_connections,
+            )
+            raise UpstreamAPIError(
+                503,
+                "Too many concurrent upstream requests, please retry later",
+                "service_unavailable_error",
+            ) from None
+
+
+_sessions: dict[str, AsyncSession] = {}
+
+
+def get_shared_session(impersonate: str) -> AsyncSession:
+    """获取指定浏览器指纹的共享会话。
+
+    会话在首次使用时创建，并绑定到当前事件循环；事件循环变化时（例如测试或重新启动）重新创建。
+    并发上游请求数受 ``upstream_max_connections`` 限制，连接池耗尽时等待
+    ``timeout_connection_pool`` 秒后返回 503。
+    共享会话不保存响应 Cookie，避免不同用户的请求之间串用 Cookie。
+
+    :param impersonate: curl_cffi 浏览器指纹版本
+    :return: 可复用的 AsyncSession
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(impersonate)
+    if session is None or session.loop is not loop:
+        if session is not None:
+            _close_stale_session(session)
+        session = SharedAsyncSession(
+            loop=loop,
+            impersonate=impersonate,  # type: ignore
+            max_clients=settings.upstream_max_connections,
+            discard_cookies=True,
+        )
+        _sessions[impersonate] = session
+        logger.debug("Shared HTTP session created: impersonate={}", impersonate)
+    return session
+
+
+def _close_stale_session(session: AsyncSession) -> None:
+    """关闭绑定到旧事件循环的会话，释放其 curl 句柄。
+
+    会话的定时器和套接字回调都注册在旧事件循环上，因此旧循环仍在运行时将关闭操作调度到旧循环执行；
+    旧循环已停止或已关闭时调度的协程永远不会执行，只能同步释放连接池中的 curl 句柄。
+
+    :param session: 需要丢弃的会话
+    """
+    old_loop = session.loop
+    if old_loop.is_running():
+        asyncio.run_coroutine_threadsafe(session.close(), old_loop)
+        logger.debug("Stale shared HTTP session close scheduled on its event loop")
+        return
+
+    while True:
+        try:
+            curl = session.pool.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        if curl:
+            curl.close()
+    logger.debug("Stale shared HTTP session released after its event loop stopped")
+
+
+async def close_shared_sessions() -> None:
+    """关闭所有共享会话，在应用关闭时调用。"""
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    for session in sessions:
+        try:
+            await session.close()
+        except Exception as e:
+            logger.warning("Failed to close shared HTTP session: error={}", str(e))
@@ -19,6 +19,11 @@ def generate_chat_id() -> str:
     return generate_uuid_str()
 
 
+def generate_chat_id_hex() -> str:
+    """生成无连字符的聊天会话 ID（32 位小写十六进制）"""
+    return uuid4().hex
+
+
 def generate_request_id() -> str:
     """生成请求 ID"""
     return generate_uuid_str()
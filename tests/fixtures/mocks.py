@@ -30,10 +30,10 @@ class MockHttpxResponse:
         """返回 JSON 数据。"""
         return self._json_data
 
-    async def aiter_lines(self) -> AsyncIterator[str]:
-        """异步迭代行数据（用于流式响应）。"""
+    async def aiter_lines(self) -> AsyncIterator[bytes]:
+        """异步迭代行数据（用于流式响应，与 curl_cffi 一致返回 bytes）。"""
         for line in self._stream_data:
-            yield line
+            yield line.encode() if isinstance(line, str) else line
 
     async def aiter_bytes(self) -> AsyncIterator[bytes]:
         """异步迭代字节数据。"""
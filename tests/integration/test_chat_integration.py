@@ -285,16 +285,16 @@ class TestNonStreamingResponse:
 
         # Mock curl_cffi AsyncSession
         with patch(
-            "src.z2p_svc.services.chat.non_streaming.AsyncSession"
+            "src.z2p_svc.services.chat.non_streaming.get_shared_session"
         ) as mock_client_class:
             mock_response = AsyncMock()
             mock_response.status_code = 200
 
             # 创建异步迭代器
             async def mock_aiter_lines():
-                yield 'data: {"type":"chat:completion","data":{"phase":"answer","delta_content":"Hello","usage":{}}}'
-                yield 'data: {"type":"chat:completion","data":{"phase":"other","delta_content":"","usage":{"prompt_tokens":10,"completion_tokens":5,"total_tokens":15}}}'
-                yield "data: [DONE]"
+                yield 'data: {"type":"chat:completion","data":{"phase":"answer","delta_content":"Hello","usage":{}}}'.encode()
+                yield 'data: {"type":"chat:completion","data":{"phase":"other","delta_content":"","usage":{"prompt_tokens":10,"completion_tokens":5,"total_tokens":15}}}'.encode()
+                yield b"data: [DONE]"
 
             mock_response.aiter_lines = mock_aiter_lines
 
@@ -421,7 +421,7 @@ class TestNonStreamingResponse:
         )
 
         with patch(
-            "src.z2p_svc.services.chat.non_streaming.AsyncSession"
+            "src.z2p_svc.services.chat.non_streaming.get_shared_session"
         ) as mock_client_class:
             mock_response = AsyncMock()
             mock_response.status_code = 200
@@ -429,11 +429,11 @@ class TestNonStreamingResponse:
             # 模拟真实的SSE响应序列
             async def mock_aiter_lines():
                 # 第一条：包含usage的消息
-                yield 'data: {"type": "chat:completion", "data": {"id": "chatcmpl-test", "usage": {"prompt_tokens": 26, "completion_tokens": 16, "total_tokens": 42}}}'
+                yield 'data: {"type": "chat:completion", "data": {"id": "chatcmpl-test", "usage": {"prompt_tokens": 26, "completion_tokens": 16, "total_tokens": 42}}}'.encode()
                 # 第二条：包含done=true和内容的消息
-                yield 'data: {"type": "chat:completion", "data": {"done": true, "delta_content": "你好！很高兴见到你。", "phase": "other"}}'
+                yield 'data: {"type": "chat:completion", "data": {"done": true, "delta_content": "你好！很高兴见到你。", "phase": "other"}}'.encode()
                 # 第三条：heartbeat（不应该被处理到）
-                yield 'data: {"type": "heartbeat", "timestamp": 1761108977.859562}'
+                yield 'data: {"type": "heartbeat", "timestamp": 1761108977.859562}'.encode()
 
             mock_response.aiter_lines = mock_aiter_lines
 
@@ -465,4 +465,214 @@ class TestNonStreamingResponse:
             assert result["choices"][0]["message"]["content"] == "你好！很高兴见到你。"
             assert result["usage"]["total_tokens"] == 42
             # 验证没有处理heartbeat消息（通过检查内容正确）
-            assert len(result["choices"][0]["message"]["content"]) == 10
\ No newline at end of file
+            assert len(result["choices"][0]["message"]["content"]) == 10
+    @pytest.mark.asyncio
+    async def test_non_streaming_joins_deltas_and_error(self):
+        """测试多个内容片段按顺序拼接，内容安全错误追加在末尾"""
+        chat_request = ChatRequest(
+            **ChatRequestBuilder()
+            .with_model("glm-4.6")
+            .with_message("user", "hello")
+            .with_streaming(False)
+            .build()
+        )
+
+        mock_prepare = AsyncMock(
+            return_value=(
+                {"model": "GLM-4-6-API-V1", "messages": [], "stream": True},
+                {"requestId": "test-123", "user_id": "user-123", "timestamp": "123"},
+                {"Authorization": "Bearer test"},
+            )
+        )
+
+        with patch(
+            "src.z2p_svc.services.chat.non_streaming.get_shared_session"
+        ) as mock_client_class:
+            mock_response = AsyncMock()
+            mock_response.status_code = 200
+
+            async def mock_aiter_lines():
+                yield 'data: {"type":"chat:completion","data":{"phase":"answer","delta_content":"你好"}}'.encode()
+                yield 'data: {"type":"chat:completion","data":{"phase":"answer","delta_content":"，世界"}}'.encode()
+                yield 'data: {"type":"chat:completion","data":{"error":{"detail":"blocked"}}}'.encode()
+                yield 'data: {"type":"chat:completion","data":{"phase":"answer","delta_content":"不应出现"}}'.encode()
+
+            mock_response.aiter_lines = mock_aiter_lines
+
+            mock_session = AsyncMock()
+            mock_session.post = AsyncMock(return_value=mock_response)
+
+            async def mock_aenter(self):
+                return mock_session
+
+            async def mock_aexit(self, *args):
+                return None
+
+            mock_session.__aenter__ = mock_aenter
+            mock_session.__aexit__ = mock_aexit
+
+            mock_client_class.return_value = mock_session
+
+            from src.z2p_svc.services.chat.non_streaming import (
+                process_non_streaming_response,
+            )
+
+            result = await process_non_streaming_response(
+                chat_request, "test-token", mock_prepare
+            )
+
+            assert result["choices"][0]["message"]["content"] == "你好，世界\n\n[Error: blocked]"
+
+    @pytest.mark.asyncio
+    async def test_non_streaming_stops_reading_after_done(self):
+        """测试收到done帧后立即结束读取并关闭响应，不等待上游关闭连接"""
+        import asyncio
+
+        chat_request = ChatRequest(
+            **ChatRequestBuilder()
+            .with_model("glm-4.6")
+            .with_message("user", "hello")
+            .with_streaming(False)
+            .build()
+        )
+
+        mock_prepare = AsyncMock(
+            return_value=(
+                {"model": "GLM-4-6-API-V1", "messages": [], "stream": True},
+                {"requestId": "test-123", "user_id": "user-123", "timestamp": "123"},
+                {"Authorization": "Bearer test"},
+            )
+        )
+
+        with patch(
+            "src.z2p_svc.services.chat.non_streaming.get_shared_session"
+        ) as mock_client_class:
+            mock_response = AsyncMock()
+            mock_response.status_code = 200
+
+            async def mock_aiter_lines():
+                yield 'data: {"type":"chat:completion","data":{"phase":"answer","delta_content":"你好"}}'.encode()
+                yield b'data: {"type":"chat:completion","data":{"phase":"done"}}'
+                # 上游在done之后保持连接不关闭
+                await asyncio.Event().wait()
+
+            mock_response.aiter_lines = mock_aiter_lines
+
+            mock_session = AsyncMock()
+            mock_session.post = AsyncMock(return_value=mock_response)
+            mock_client_class.return_value = mock_session
+
+            from src.z2p_svc.services.chat.non_streaming import (
+                process_non_streaming_response,
+            )
+
+            result = await asyncio.wait_for(
+                process_non_streaming_response(chat_request, "test-token", mock_prepare),
+                timeout=1,
+            )
+
+            assert result["choices"][0]["message"]["content"] == "你好"
+            assert mock_session.post.call_args.kwargs["stream"] is True
+            mock_response.aclose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_non_streaming_closes_response_on_upstream_error(self):
+        """测试上游返回错误状态码时也会关闭流式响应"""
+        from src.z2p_svc.exceptions import UpstreamAPIError
+
+        chat_request = ChatRequest(
+            **ChatRequestBuilder()
+            .with_model("glm-4.6")
+            .with_message("user", "hello")
+            .with_streaming(False)
+            .build()
+        )
+
+        mock_prepare = AsyncMock(
+            return_value=(
+                {"model": "GLM-4-6-API-V1", "messages": [], "stream": True},
+                {"requestId": "test-123", "user_id": "user-123", "timestamp": "123"},
+                {"Authorization": "Bearer test"},
+            )
+        )
+
+        with patch(
+            "src.z2p_svc.services.chat.non_streaming.get_shared_session"
+        ) as mock_client_class:
+            mock_response = AsyncMock()
+            mock_response.status_code = 500
+            mock_response.aread = AsyncMock(return_value=b"upstream failure")
+            mock_response.url = "https://upstream.test/api/chat/completions"
+
+            mock_session = AsyncMock()
+            mock_session.post = AsyncMock(return_value=mock_response)
+            mock_client_class.return_value = mock_session
+
+            from src.z2p_svc.services.chat.non_streaming import (
+                process_non_streaming_response,
+            )
+
+            with pytest.raises(UpstreamAPIError) as exc_info:
+                await process_non_streaming_response(chat_request, "test-token", mock_prepare)
+
+            assert exc_info.value.status_code == 500
+            mock_response.aclose.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_non_streaming_result_matches_response_model(self):
+        """测试直接构建的响应字典符合 ChatCompletionResponse，usage 只保留声明的字段"""
+        from src.z2p_svc.models import ChatCompletionResponse
+
+        chat_request = ChatRequest(
+            **ChatRequestBuilder()
+            .with_model("glm-4.6")
+            .with_message("user", "hello")
+            .with_streaming(False)
+            .build()
+        )
+
+        mock_prepare = AsyncMock(
+            return_value=(
+                {"model": "GLM-4-6-API-V1", "messages": [], "stream": True},
+                {"requestId": "test-123", "user_id": "user-123", "timestamp": "123"},
+                {"Authorization": "Bearer test"},
+            )
+        )
+
+        with patch(
+            "src.z2p_svc.services.chat.non_streaming.get_shared_session"
+        ) as mock_client_class:
+            mock_response = AsyncMock()
+            mock_response.status_code = 200
+
+            async def mock_aiter_lines():
+                yield b'data: {"type":"chat:completion","data":{"phase":"answer","delta_content":"Hi"}}'
+                yield b'data: {"type":"chat:completion","data":{"phase":"other","usage":{"prompt_tokens":3,"completion_tokens":1,"total_tokens":4,"cached_tokens":0}}}'
+                yield b'data: {"type":"chat:completion","data":{"phase":"done"}}'
+
+            mock_response.aiter_lines = mock_aiter_lines
+
+            mock_session = AsyncMock()
+            mock_session.post = AsyncMock(return_value=mock_response)
+
+            async def mock_aenter(self):
+                return mock_session
+
+            async def mock_aexit(self, *args):
+                return None
+
+            mock_session.__aenter__ = mock_aenter
+            mock_session.__aexit__ = mock_aexit
+
+            mock_client_class.return_value = mock_session
+
+            from src.z2p_svc.services.chat.non_streaming import (
+                process_non_streaming_response,
+            )
+
+            result = await process_non_streaming_response(
+                chat_request, "test-token", mock_prepare
+            )
+
+            assert ChatCompletionResponse.model_validate(result).model_dump(exclude_none=True) == result
+            assert result["usage"] == {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4}
@@ -3,11 +3,13 @@
 测试 chat_service 模块的核心功能，包括模型特性配置、请求数据准备等。
 """
 
+import inspect
+
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 from datetime import datetime
 
-from src.z2p_svc.chat_service import get_model_features, prepare_request_data
+from src.z2p_svc.chat_service import get_model_features, prepare_request_data, process_streaming_response
 from src.z2p_svc.models import ChatRequest
 from tests.fixtures import ChatRequestBuilder, create_mock_settings
 
@@ -198,6 +200,29 @@ class TestPrepareRequestData:
 
             assert "不存在" in str(exc_info.value)
 
+    @pytest.mark.asyncio
+    async def test_cached_models_reused_without_await(self, mock_access_token):
+        """测试模型列表已缓存时直接复用，不再等待 get_models。"""
+        chat_request = ChatRequest(
+            **ChatRequestBuilder()
+            .with_model("glm-4.6")
+            .with_message("user", "你好")
+            .build()
+        )
+
+        with (
+            patch("src.z2p_svc.model_service.get_models") as mock_get_models,
+            patch("src.z2p_svc.model_service.get_models_cache") as mock_get_cache,
+        ):
+            mock_get_cache.return_value = {
+                "data": [{"id": "glm-4.6", "info": {"id": "GLM-4-6-API-V1"}}]
+            }
+
+            zai_data, _, _ = await prepare_request_data(chat_request, mock_access_token)
+
+        assert zai_data["model"] == "GLM-4-6-API-V1"
+        mock_get_models.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_file_upload_processing(self, mock_access_token):
         """测试文件上传处理。
@@ -946,4 +971,25 @@ class TestGLM46VFileHandling:
             ]
             
             assert "upstream-mcp-1" in mcp_servers
-            assert "upstream-mcp-2" in mcp_servers
\ No newline at end of file
+            assert "upstream-mcp-2" in mcp_servers
+
+
+@pytest.mark.unit
+class TestProcessStreamingResponse:
+    """process_streaming_response 函数测试。"""
+
+    @pytest.mark.asyncio
+    async def test_returns_native_async_generator(self, mock_access_token):
+        """测试返回原生异步生成器，StreamingResponse 无需转入线程池迭代。"""
+        chat_request = ChatRequest(
+            **ChatRequestBuilder().with_model("glm-4.6").with_message("user", "hi").with_streaming(True).build()
+        )
+
+        with patch("src.z2p_svc.services.chat.streaming.get_shared_session") as mock_client_class:
+            stream = process_streaming_response(chat_request, mock_access_token)
+            try:
+                assert inspect.isasyncgen(stream)
+                # 创建生成器不会提前发起上游请求
+                mock_client_class.assert_not_called()
+            finally:
+                await stream.aclose()
@@ -137,6 +137,49 @@ class TestConvertMessages:
         assert result.file_urls == []
         assert result.last_user_message_text == ""
 
+    def test_text_only_fast_path_matches_general_path(self):
+        """测试纯文本快速路径与通用路径结果一致（包括空内容和非 user 结尾）。"""
+        text_messages = [
+            Message(role="user", content="问题"),
+            Message(role="user", content=""),
+            Message(role="assistant", content="回答"),
+        ]
+        # 混入一条列表内容以走通用路径
+        mixed_messages = text_messages + [Message(role="assistant", content=[])]
+
+        fast = convert_messages(text_messages)
+        general = convert_messages(mixed_messages)
+
+        assert fast.messages == general.messages
+        assert fast.last_user_message_text == general.last_user_message_text == ""
+        assert fast.file_urls == []
+
+    def test_single_text_part_treated_as_string(self):
+        """测试仅含一个文本片段的列表内容与字符串内容结果一致，空文本被跳过。"""
+        messages = [
+            Message(role="user", content=[{"type": "text", "text": "你好"}]),
+            Message(role="assistant", content=[{"type": "text", "text": ""}]),
+            Message(role="user", content=[{"type": "image_url", "image_url": {"url": "https://example.com/a.png"}}]),
+        ]
+
+        result = convert_messages(messages)
+
+        assert result.messages == [{"role": "user", "content": "你好"}]
+        assert result.last_user_message_text == "你好"
+        assert result.file_urls == ["https://example.com/a.png"]
+
+    def test_none_content_skipped(self):
+        """测试内容为 None 的消息被跳过。"""
+        messages = [
+            Message(role="assistant", content=None),
+            Message(role="user", content="你好"),
+        ]
+
+        result = convert_messages(messages)
+
+        assert result.messages == [{"role": "user", "content": "你好"}]
+        assert result.last_user_message_text == "你好"
+
     def test_message_without_text(self):
         """测试没有文本的消息。"""
         messages = [
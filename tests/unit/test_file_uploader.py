@@ -187,7 +187,7 @@ class TestUploadBase64File:
             "meta": {"cdn_url": "https://cdn.example.com/file123"},
         }
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
             mock_response = Mock()
             mock_response.status_code = 200
@@ -215,7 +215,7 @@ class TestUploadBase64File:
 
         mock_response_data = {"id": "file123", "filename": "generated.png", "meta": {}}
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
             mock_response = Mock()
             mock_response.status_code = 200
@@ -232,6 +232,21 @@ class TestUploadBase64File:
             # 验证调用了post方法
             mock_client.post.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_decode_log_uses_resolved_filename(self, mock_access_token):
+        """测试解码日志记录的是补全后的文件名，而不是 None。"""
+        uploader = FileUploader(mock_access_token)
+        base64_data = base64.b64encode(b"test").decode("utf-8")
+
+        with (
+            patch("src.z2p_svc.file_uploader.logger") as mock_logger,
+            patch.object(uploader, "upload_file_bytes", new_callable=AsyncMock) as mock_upload_bytes,
+        ):
+            await uploader.upload_base64_file(base64_data, "photo", "jpg")
+
+        assert mock_logger.info.call_args.args[1] == "photo.jpg"
+        assert mock_upload_bytes.call_args.args[1] == "photo.jpg"
+
     @pytest.mark.asyncio
     async def test_invalid_base64(self, mock_access_token):
         """测试无效Base64数据。"""
@@ -262,7 +277,7 @@ class TestUploadBase64File:
         test_data = b"test"
         base64_data = base64.b64encode(test_data).decode("utf-8")
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
             mock_response = Mock()
             mock_response.status_code = 500
@@ -287,7 +302,7 @@ class TestUploadBase64File:
 
         mock_response_data = {"filename": "test.png"}  # 缺少 id
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
             mock_response = Mock()
             mock_response.json.return_value = mock_response_data
@@ -315,7 +330,7 @@ class TestUploadBase64File:
             "meta": {},
         }
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
             mock_response = Mock()
             mock_response.status_code = 200
@@ -332,6 +347,44 @@ class TestUploadBase64File:
             assert result["id"] == "file123"  # 应该只保留UUID部分
 
 
+@pytest.mark.unit
+class TestUploadFileBytes:
+    """upload_file_bytes 方法测试。"""
+
+    @pytest.mark.asyncio
+    async def test_uploads_raw_bytes(self, mock_access_token):
+        """测试直接上传原始字节（无需 Base64 往返）。"""
+        uploader = FileUploader(mock_access_token)
+
+        mock_response_data = {"id": "file123", "filename": "notes.txt", "meta": {}}
+
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
+            mock_client = AsyncMock()
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.json.return_value = mock_response_data
+            mock_client.post = AsyncMock(return_value=mock_response)
+            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+            mock_client.__aexit__ = AsyncMock(return_value=None)
+            mock_client_class.return_value = mock_client
+
+            result = await uploader.upload_file_bytes(b"hello", "notes.txt")
+
+            assert result is not None
+            assert result["id"] == "file123"
+            assert result["size"] == 5
+            assert result["media"] == "file"
+
+    @pytest.mark.asyncio
+    async def test_file_too_large(self, mock_access_token):
+        """测试超过大小限制的字节数据被拒绝。"""
+        uploader = FileUploader(mock_access_token)
+
+        result = await uploader.upload_file_bytes(b"x" * (FileUploader.MAX_FILE_SIZE + 1), "large.png")
+
+        assert result is None
+
+
 @pytest.mark.unit
 class TestUploadFileFromUrl:
     """upload_file_from_url 方法测试。"""
@@ -344,7 +397,7 @@ class TestUploadFileFromUrl:
         test_url = "https://example.com/test.png"
         test_data = b"fake image data"
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
 
             # Mock GET请求（下载文件）
@@ -380,6 +433,35 @@ class TestUploadFileFromUrl:
 
             assert result is not None
             assert result["id"] == "file456"
+            assert result["size"] == len(test_data)
+
+    @pytest.mark.asyncio
+    async def test_url_upload_skips_base64_roundtrip(self, mock_access_token):
+        """测试下载的原始字节直接传给 upload_file_bytes。"""
+        uploader = FileUploader(mock_access_token)
+
+        test_url = "https://example.com/test.png"
+        test_data = b"fake image data"
+
+        with (
+            patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class,
+            patch.object(uploader, "upload_file_bytes", new_callable=AsyncMock) as mock_upload,
+            patch.object(uploader, "upload_base64_file", new_callable=AsyncMock) as mock_upload_base64,
+        ):
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.content = test_data
+            mock_response.headers = {"content-type": "image/png"}
+            mock_client = AsyncMock()
+            mock_client.get = AsyncMock(return_value=mock_response)
+            mock_client_class.return_value = mock_client
+            mock_upload.return_value = {"id": "file456"}
+
+            result = await uploader.upload_file_from_url(test_url)
+
+            assert result == {"id": "file456"}
+            mock_upload.assert_awaited_once_with(test_data, "test.png", file_type="png")
+            mock_upload_base64.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_url_download_failure(self, mock_access_token):
@@ -388,7 +470,7 @@ class TestUploadFileFromUrl:
 
         test_url = "https://example.com/notfound.png"
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
             mock_response = Mock()
             mock_response.status_code = 404
@@ -409,7 +491,7 @@ class TestUploadFileFromUrl:
         uploader = FileUploader(mock_access_token)
         test_url = "https://example.com/slow.png"
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
             mock_client.get = AsyncMock(side_effect=Exception("Timeout"))
             mock_client.__aenter__ = AsyncMock(return_value=mock_client)
@@ -428,7 +510,7 @@ class TestUploadFileFromUrl:
         test_url = "https://example.com/download"
         test_data = b"test"
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
 
             mock_get_response = Mock()
@@ -467,7 +549,7 @@ class TestUploadFileFromUrl:
         test_url = "https://example.com/large.png"
         large_data = b"x" * (FileUploader.MAX_FILE_SIZE + 1)
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
             mock_response = Mock()
             mock_response.content = large_data
@@ -490,7 +572,7 @@ class TestUploadFileFromUrl:
         test_url = "https://example.com/"
         test_data = b"test"
 
-        with patch("src.z2p_svc.file_uploader.AsyncSession") as mock_client_class:
+        with patch("src.z2p_svc.file_uploader.get_shared_session") as mock_client_class:
             mock_client = AsyncMock()
 
             mock_get_response = Mock()
@@ -0,0 +1,109 @@
+"""共享 HTTP 会话单元测试。"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.z2p_svc.exceptions import UpstreamAPIError
+from src.z2p_svc.utils import http_session
+from src.z2p_svc.utils.http_session import close_shared_sessions, get_shared_session
+
+
+@pytest.mark.unit
+class TestSharedSession:
+    """get_shared_session / close_shared_sessions 测试。"""
+
+    @pytest.mark.asyncio
+    async def test_session_reused_per_impersonate(self):
+        """测试相同指纹复用同一会话，不同指纹使用独立会话。"""
+        try:
+            first = get_shared_session("chrome136")
+            second = get_shared_session("chrome136")
+            other = get_shared_session("safari184")
+
+            assert first is second
+            assert other is not first
+            assert first.discard_cookies is True
+        finally:
+            await close_shared_sessions()
+
+    @pytest.mark.asyncio
+    async def test_close_clears_sessions(self):
+        """测试关闭后重新创建会话。"""
+        first = get_shared_session("chrome136")
+
+        await close_shared_sessions()
+
+        assert http_session._sessions == {}
+        try:
+            assert get_shared_session("chrome136") is not first
+        finally:
+            await close_shared_sessions()
+
+    @pytest.mark.asyncio
+    async def test_exhausted_pool_fails_instead_of_hanging(self, monkeypatch):
+        """测试连接池占满时，下一个请求在超时后返回 503 而不是永久等待。"""
+        monkeypatch.setattr(http_session.settings, "upstream_max_connections", 1)
+        monkeypatch.setattr(http_session.settings, "timeout_connection_pool", 0.05)
+        session = get_shared_session("chrome136")
+        try:
+            held = await session.pop_curl()
+
+            with pytest.raises(UpstreamAPIError) as exc_info:
+                await asyncio.wait_for(session.post("https://upstream.test/api"), timeout=1)
+
+            assert exc_info.value.status_code == 503
+            assert exc_info.value.error_type == "service_unavailable_error"
+            session.push_curl(held)
+        finally:
+            await close_shared_sessions()
+
+    def test_stale_session_closed_on_its_running_loop(self):
+        """测试事件循环变化时，旧循环仍在运行则在其上关闭旧会话。"""
+        old_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=old_loop.run_forever, daemon=True)
+        thread.start()
+        new_loop = asyncio.new_event_loop()
+
+        async def get_session():
+            return get_shared_session("chrome136")
+
+        try:
+            stale = asyncio.run_coroutine_threadsafe(get_session(), old_loop).result(timeout=1)
+            fresh = new_loop.run_until_complete(get_session())
+
+            assert fresh is not stale
+            deadline = time.monotonic() + 1
+            while not stale._closed and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert stale._closed is True
+        finally:
+            new_loop.run_until_complete(close_shared_sessions())
+            old_loop.call_soon_threadsafe(old_loop.stop)
+            thread.join(timeout=1)
+            old_loop.close()
+            new_loop.close()
+
+    @pytest.mark.parametrize("close_old_loop", [False, True])
+    def test_stale_session_released_when_loop_not_running(self, close_old_loop):
+        """测试旧事件循环已停止或已关闭时，同步释放旧会话的句柄。"""
+        old_loop = asyncio.new_event_loop()
+        new_loop = asyncio.new_event_loop()
+
+        async def get_session():
+            return get_shared_session("chrome136")
+
+        try:
+            stale = old_loop.run_until_complete(get_session())
+            if close_old_loop:
+                old_loop.close()
+
+            assert new_loop.run_until_complete(get_session()) is not stale
+            # 池中句柄已同步释放，而不是调度到不会再运行的旧循环上
+            assert stale.pool.empty()
+        finally:
+            new_loop.run_until_complete(close_shared_sessions())
+            old_loop.close()
+            new_loop.close()
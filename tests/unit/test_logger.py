@@ -0,0 +1,25 @@
+"""日志模块单元测试。"""
+
+import pytest
+
+from src.z2p_svc import logger as logger_module
+from src.z2p_svc.logger import is_level_enabled
+
+
+@pytest.mark.unit
+class TestIsLevelEnabled:
+    """is_level_enabled 函数测试。"""
+
+    def test_levels_below_threshold_disabled(self, monkeypatch):
+        """测试低于配置级别的日志被判定为关闭。"""
+        monkeypatch.setattr(logger_module, "_min_level_no", 30)
+
+        assert is_level_enabled("INFO") is False
+        assert is_level_enabled("WARNING") is True
+        assert is_level_enabled("ERROR") is True
+
+    def test_all_levels_enabled_before_configuration(self, monkeypatch):
+        """测试未配置日志时不过滤任何级别。"""
+        monkeypatch.setattr(logger_module, "_min_level_no", 0)
+
+        assert is_level_enabled("DEBUG") is True
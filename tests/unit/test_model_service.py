@@ -3,6 +3,8 @@
 测试 model_service 模块的核心功能，包括模型列表获取、缓存、映射等。
 """
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 from datetime import datetime
@@ -14,8 +16,29 @@ from src.z2p_svc.model_service import (
     fetch_models_from_upstream,
     get_models,
     clear_models_cache,
+    get_capability_flags,
+    get_enabled_features,
     FEATURE_SWITCHES,
 )
+from src.z2p_svc.models import UpstreamCapability
+
+
+def _upstream_model(model_id: str) -> dict:
+    """构造最小的上游模型数据。"""
+    return {
+        "id": model_id,
+        "name": model_id,
+        "owned_by": "openai",
+        "openai": {"id": model_id, "name": model_id, "owned_by": "openai", "openai": {"id": model_id}, "urlIdx": 0},
+        "urlIdx": 0,
+        "info": {
+            "id": model_id,
+            "name": model_id,
+            "is_active": True,
+            "created_at": 1234567890,
+            "meta": {"capabilities": {}},
+        },
+    }
 
 
 @pytest.mark.unit
@@ -352,6 +375,108 @@ class TestGetModels:
             # 验证结果相同
             assert result1 == result2
 
+    @pytest.mark.asyncio
+    async def test_expired_cache_refreshed(self, mock_access_token):
+        """测试缓存过期后重新从上游获取。"""
+        from src.z2p_svc import model_service
+
+        clear_models_cache()
+
+        with patch(
+            "src.z2p_svc.model_service.fetch_models_from_upstream"
+        ) as mock_fetch:
+            mock_fetch.return_value = {"data": [_upstream_model("TEST-MODEL")]}
+
+            await get_models(mock_access_token, use_cache=True)
+            model_service._models_cache_expiry = 0.0
+            mock_fetch.return_value = {"data": [_upstream_model("OTHER-MODEL")]}
+
+            result = await get_models(mock_access_token, use_cache=True)
+
+            assert mock_fetch.call_count == 2
+            assert [m["id"] for m in result["data"]] == ["other-model"]
+
+    @pytest.mark.asyncio
+    async def test_expired_cache_served_when_refresh_fails(self, mock_access_token):
+        """测试刷新失败时继续返回旧缓存。"""
+        from src.z2p_svc import model_service
+
+        clear_models_cache()
+
+        with patch(
+            "src.z2p_svc.model_service.fetch_models_from_upstream"
+        ) as mock_fetch:
+            mock_fetch.return_value = {"data": [_upstream_model("TEST-MODEL")]}
+            cached = await get_models(mock_access_token, use_cache=True)
+
+            model_service._models_cache_expiry = 0.0
+            mock_fetch.side_effect = Exception("upstream down")
+
+            result = await get_models(mock_access_token, use_cache=True)
+
+            assert result is cached
+            assert model_service._models_cache_expiry > 0.0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_loads_fetch_once(self, mock_access_token):
+        """测试并发首次加载时只请求一次上游，其余请求复用结果。"""
+        clear_models_cache()
+
+        async def slow_fetch(access_token):
+            await asyncio.sleep(0.01)
+            return {"data": [_upstream_model("TEST-MODEL")]}
+
+        with patch(
+            "src.z2p_svc.model_service.fetch_models_from_upstream", side_effect=slow_fetch
+        ) as mock_fetch:
+            results = await asyncio.gather(
+                *(get_models(mock_access_token, use_cache=True) for _ in range(5))
+            )
+
+        assert mock_fetch.call_count == 1
+        assert all(result is results[0] for result in results)
+
+    def test_concurrent_loads_in_new_event_loop(self, mock_access_token):
+        """测试事件循环变化后，并发加载不会等待绑定到旧循环的刷新锁。"""
+        async def slow_fetch(access_token):
+            await asyncio.sleep(0.01)
+            return {"data": [_upstream_model("TEST-MODEL")]}
+
+        async def concurrent_loads():
+            clear_models_cache()
+            return await asyncio.gather(
+                *(get_models(mock_access_token, use_cache=True) for _ in range(3))
+            )
+
+        with patch(
+            "src.z2p_svc.model_service.fetch_models_from_upstream", side_effect=slow_fetch
+        ) as mock_fetch:
+            asyncio.run(concurrent_loads())
+            results = asyncio.run(concurrent_loads())
+
+        assert mock_fetch.call_count == 2
+        assert all(result is results[0] for result in results)
+
+    @pytest.mark.asyncio
+    async def test_expired_cache_served_while_refreshing(self, mock_access_token):
+        """测试已有请求在刷新时，其余请求直接返回旧缓存。"""
+        from src.z2p_svc import model_service
+
+        clear_models_cache()
+
+        with patch(
+            "src.z2p_svc.model_service.fetch_models_from_upstream"
+        ) as mock_fetch:
+            mock_fetch.return_value = {"data": [_upstream_model("TEST-MODEL")]}
+            cached = await get_models(mock_access_token, use_cache=True)
+            model_service._models_cache_expiry = 0.0
+
+            async with model_service._get_models_refresh_lock():
+                result = await get_models(mock_access_token, use_cache=True)
+
+        assert result is cached
+        assert mock_fetch.call_count == 1
+
     @pytest.mark.asyncio
     async def test_cache_bypass(self, mock_access_token):
         """测试绕过缓存。"""
@@ -792,4 +917,35 @@ class TestFeatureSwitches:
         for feature, config in FEATURE_SWITCHES.items():
             assert "suffix" in config
             assert "name_suffix" in config
-            assert "description_suffix" in config
\ No newline at end of file
+            assert "description_suffix" in config
+
+
+@pytest.mark.unit
+class TestGetEnabledFeatures:
+    """get_enabled_features 函数测试。"""
+
+    def test_flags_follow_feature_switch_order(self):
+        """测试能力开关元组按 FEATURE_SWITCHES 顺序提取。"""
+        capabilities = UpstreamCapability(think=True, web_search=False, vision=True, file_qa=False)
+
+        assert get_capability_flags(capabilities) == (True, False, True, False)
+
+    def test_enabled_features(self):
+        """测试仅返回已启用的功能键。"""
+        result = get_enabled_features(True, True, False, False)
+
+        assert result == ("think", "web_search")
+
+    def test_no_features_enabled(self):
+        """测试无启用功能时返回空元组。"""
+        assert get_enabled_features(False, False, False, False) == ()
+
+    def test_result_is_memoized(self):
+        """测试相同能力组合命中缓存。"""
+        get_enabled_features.cache_clear()
+
+        first = get_enabled_features(True, False, False, True)
+        second = get_enabled_features(True, False, False, True)
+
+        assert first is second
+        assert get_enabled_features.cache_info().hits == 1
@@ -0,0 +1,274 @@
+"""流式响应处理单元测试。
+
+测试 services.chat.streaming 模块的 SSE 解析和数据块生成。
+"""
+
+import json
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from curl_cffi.requests.exceptions import ConnectionError as CurlConnectionError
+
+from src.z2p_svc.models import ChatRequest
+from src.z2p_svc.services.chat.streaming import (
+    SSE_DONE,
+    create_chat_completion_chunk,
+    create_error_chunk,
+    process_streaming_response,
+)
+from tests.fixtures import ChatRequestBuilder
+
+
+def _build_chat_request() -> ChatRequest:
+    return ChatRequest(
+        **ChatRequestBuilder()
+        .with_model("glm-4.6")
+        .with_message("user", "hello")
+        .with_streaming(True)
+        .build()
+    )
+
+
+def _mock_prepare() -> AsyncMock:
+    return AsyncMock(
+        return_value=(
+            {"model": "GLM-4-6-API-V1", "messages": [], "stream": True},
+            {"requestId": "test-req", "user_id": "test-user", "timestamp": "123"},
+            {"Authorization": "Bearer test-token"},
+        )
+    )
+
+
+def _mock_session_class(mock_client_class, lines: list, status_code: int = 200) -> AsyncMock:
+    """配置 AsyncSession mock，使其返回给定的 SSE 行。"""
+    mock_response = AsyncMock()
+    mock_response.status_code = status_code
+
+    async def mock_aiter_lines():
+        # curl_cffi 的 aiter_lines 返回 bytes
+        for line in lines:
+            yield line.encode()
+
+    mock_response.aiter_lines = mock_aiter_lines
+
+    mock_session = AsyncMock()
+    mock_session.post = AsyncMock(return_value=mock_response)
+    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
+    mock_session.__aexit__ = AsyncMock(return_value=None)
+    mock_client_class.return_value = mock_session
+    return mock_response
+
+
+def _parse_frames(chunks: list[bytes]) -> list:
+    """将 SSE 帧解析为 JSON 对象（[DONE] 保留为字符串）。"""
+    frames = []
+    for chunk in chunks:
+        assert isinstance(chunk, bytes)
+        assert chunk.startswith(b"data: ") and chunk.endswith(b"\n\n")
+        payload = chunk[6:-2].decode("utf-8")
+        frames.append(payload if payload == "[DONE]" else json.loads(payload))
+    return frames
+
+
+async def _collect(lines: list, enable_toolify: bool = False) -> list[bytes]:
+    with patch("src.z2p_svc.services.chat.streaming.get_shared_session") as mock_client_class:
+        _mock_session_class(mock_client_class, lines)
+        return [
+            chunk
+            async for chunk in process_streaming_response(
+                _build_chat_request(), "test-token", _mock_prepare(), enable_toolify
+            )
+        ]
+
+
+@pytest.mark.unit
+class TestCreateChunks:
+    """数据块构造函数测试。"""
+
+    def test_thinking_chunk_uses_reasoning_content(self):
+        """测试 thinking 阶段写入 reasoning_content。"""
+        chunk = create_chat_completion_chunk("思考", "glm-4.6", 1, "thinking", "chatcmpl-1")
+
+        assert chunk["choices"][0]["delta"] == {"role": "assistant", "reasoning_content": "思考"}
+        assert chunk["choices"][0]["finish_reason"] is None
+
+    def test_other_chunk_with_usage(self):
+        """测试 other 阶段携带 usage 和 finish_reason。"""
+        usage = {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3}
+        chunk = create_chat_completion_chunk("", "glm-4.6", 1, "other", "chatcmpl-1", usage, "stop")
+
+        assert chunk["usage"] == usage
+        assert chunk["choices"][0]["finish_reason"] == "stop"
+
+    def test_error_chunk_is_sse_bytes(self):
+        """测试错误块编码为 SSE bytes。"""
+        chunk = create_error_chunk("boom", "server_error", "glm-4.6", 500)
+
+        frame = _parse_frames([chunk])[0]
+        assert frame["error"] == {"message": "boom", "type": "server_error", "code": 500}
+        assert frame["choices"][0]["finish_reason"] == "error"
+
+
+@pytest.mark.unit
+class TestProcessStreamingResponse:
+    """process_streaming_response 函数测试。"""
+
+    @pytest.mark.asyncio
+    async def test_phases_emitted_as_bytes(self):
+        """测试各阶段内容按 OpenAI 格式以 bytes 输出。"""
+        lines = [
+            'data: {"type":"chat:completion","data":{"phase":"thinking","delta_content":"想"}}',
+            'data: {"type":"chat:completion","data":{"phase":"answer","delta_content":"你好"}}',
+            'data: {"type":"chat:completion","data":{"phase":"other","delta_content":"","usage":{"total_tokens":3}}}',
+            'data: {"type":"chat:completion","data":{"phase":"done"}}',
+        ]
+
+        chunks = await _collect(lines)
+        frames = _parse_frames(chunks)
+
+        assert chunks[-1] == SSE_DONE
+        assert frames[0]["choices"][0]["delta"]["reasoning_content"] == "想"
+        assert frames[1]["choices"][0]["delta"]["content"] == "你好"
+        # 复用的数据块模板不能把上一帧的字段带到下一帧
+        assert "content" not in frames[0]["choices"][0]["delta"]
+        assert "reasoning_content" not in frames[1]["choices"][0]["delta"]
+        assert frames[1]["choices"][0]["finish_reason"] is None
+        assert "usage" not in frames[1]
+        assert frames[2]["usage"] == {"total_tokens": 3}
+        assert frames[2]["choices"][0]["finish_reason"] == "stop"
+        assert len({frame["id"] for frame in frames[:-1]}) == 1
+
+    @pytest.mark.asyncio
+    async def test_summary_and_details_stripped(self):
+        """测试 thinking 的 summary 和 answer 的 details 前缀被去除。"""
+        lines = [
+            'data: {"type":"chat:completion","data":{"phase":"thinking","delta_content":"<details><summary>x</summary>\\n思考"}}',
+            'data: {"type":"chat:completion","data":{"phase":"answer","edit_content":"思考</details>\\n回答"}}',
+            'data: {"type":"chat:completion","data":{"phase":"done"}}',
+        ]
+
+        frames = _parse_frames(await _collect(lines))
+
+        assert frames[0]["choices"][0]["delta"]["reasoning_content"] == "思考"
+        assert frames[1]["choices"][0]["delta"]["content"] == "\n回答"
+
+    @pytest.mark.asyncio
+    async def test_tool_call_glm_block_stripped(self):
+        """测试 tool_call 阶段去除 glm_block 包装，不含标记的增量原样输出。"""
+        block = '<glm_block view="">{"type": "mcp", "data": {"metadata": {"id": "1", "result": ""}}</glm_block>'
+        lines = [
+            "data: " + json.dumps({"type": "chat:completion", "data": {"phase": "tool_call", "edit_content": block}}),
+            'data: {"type":"chat:completion","data":{"phase":"tool_call","delta_content":"plain"}}',
+            'data: {"type":"chat:completion","data":{"phase":"done"}}',
+        ]
+
+        frames = _parse_frames(await _collect(lines))
+
+        assert frames[0]["choices"][0]["delta"]["content"] == '{"id": "1'
+        assert frames[1]["choices"][0]["delta"]["content"] == "plain"
+
+    @pytest.mark.asyncio
+    async def test_content_error_stops_stream(self):
+        """测试上游内容错误时返回 content_filter 并结束。"""
+        lines = [
+            'data: {"type":"chat:completion","data":{"error":{"detail":"blocked"}}}',
+            'data: {"type":"chat:completion","data":{"phase":"answer","delta_content":"ignored"}}',
+        ]
+
+        chunks = await _collect(lines)
+        frames = _parse_frames(chunks)
+
+        assert len(frames) == 2
+        assert frames[0]["choices"][0]["finish_reason"] == "content_filter"
+        assert "blocked" in frames[0]["choices"][0]["delta"]["content"]
+        assert chunks[-1] == SSE_DONE
+
+    @pytest.mark.asyncio
+    async def test_invalid_lines_skipped(self):
+        """测试非 data 行和无效 JSON 被跳过。"""
+        lines = [
+            "",
+            ": keep-alive",
+            "data: not-json",
+            'data: {"type":"chat:completion","data":{"phase":"answer","delta_content":"ok"}}',
+            'data: {"type":"chat:completion","data":{"phase":"done"}}',
+        ]
+
+        frames = _parse_frames(await _collect(lines))
+
+        assert frames[0]["choices"][0]["delta"]["content"] == "ok"
+        assert frames[-1] == "[DONE]"
+
+    @pytest.mark.asyncio
+    async def test_data_line_without_space(self):
+        """测试 "data:" 后没有空格的行同样被解析。"""
+        lines = [
+            'data:{"type":"chat:completion","data":{"phase":"answer","delta_content":"ok"}}',
+            'data:{"type":"chat:completion","data":{"phase":"done"}}',
+        ]
+
+        frames = _parse_frames(await _collect(lines))
+
+        assert frames[0]["choices"][0]["delta"]["content"] == "ok"
+        assert frames[-1] == "[DONE]"
+
+    @pytest.mark.asyncio
+    async def test_upstream_status_error_emitted_as_sse(self):
+        """测试上游错误状态码以 SSE 错误事件返回而不是抛出异常。"""
+        with patch("src.z2p_svc.services.chat.streaming.get_shared_session") as mock_client_class:
+            mock_response = _mock_session_class(mock_client_class, [], status_code=429)
+            mock_response.aread = AsyncMock(return_value=b"rate limited")
+            mock_response.url = "https://upstream.test/api/chat/completions"
+            chunks = [
+                chunk
+                async for chunk in process_streaming_response(
+                    _build_chat_request(), "test-token", _mock_prepare(), False
+                )
+            ]
+
+        frames = _parse_frames(chunks)
+
+        assert len(frames) == 2
+        assert frames[0]["error"]["code"] == 429
+        assert frames[0]["choices"][0]["finish_reason"] == "error"
+        assert chunks[-1] == SSE_DONE
+
+    @pytest.mark.asyncio
+    async def test_upstream_connection_error_classified_by_type(self):
+        """测试 curl_cffi 连接异常按类型归类为 request_error。"""
+        with patch("src.z2p_svc.services.chat.streaming.get_shared_session") as mock_client_class:
+            _mock_session_class(mock_client_class, [])
+            mock_client_class.return_value.post = AsyncMock(
+                side_effect=CurlConnectionError("connection refused")
+            )
+            chunks = [
+                chunk
+                async for chunk in process_streaming_response(
+                    _build_chat_request(), "test-token", _mock_prepare(), False
+                )
+            ]
+
+        frames = _parse_frames(chunks)
+
+        assert frames[0]["error"]["type"] == "request_error"
+        assert frames[0]["error"]["code"] == 500
+        assert chunks[-1] == SSE_DONE
+
+    @pytest.mark.asyncio
+    async def test_prepare_failure_emitted_as_sse(self):
+        """测试请求准备阶段的异常以通用 SSE 错误事件返回，不泄露异常信息。"""
+        prepare = AsyncMock(side_effect=ValueError("bad model"))
+
+        with patch("src.z2p_svc.services.chat.streaming.get_shared_session") as mock_client_class:
+            _mock_session_class(mock_client_class, [])
+            chunks = [
+                chunk
+                async for chunk in process_streaming_response(_build_chat_request(), "test-token", prepare, False)
+            ]
+
+        frames = _parse_frames(chunks)
+
+        assert frames[0]["error"] == {"message": "Internal server error", "type": "server_error", "code": 500}
+        assert b"bad model" not in b"".join(chunks)
+        assert chunks[-1] == SSE_DONE
@@ -70,6 +70,20 @@ class TestToolCallMappingManager:
         assert manager.get("call_1") is None
         assert manager.get("call_4") is not None
 
+    def test_store_many(self):
+        """测试批量存储映射并遵守大小限制。"""
+        manager = ToolCallMappingManager(max_size=2)
+
+        manager.store_many([
+            ("call_1", "tool1", {}),
+            ("call_2", "tool2", {"a": 1}),
+            ("call_3", "tool3", {"b": 2}),
+        ])
+
+        assert manager.get("call_1") is None
+        assert manager.get("call_2")["args"] == {"a": 1}
+        assert manager.get("call_3")["name"] == "tool3"
+
     def test_lru_behavior(self):
         """测试LRU行为。"""
         manager = ToolCallMappingManager(max_size=3)
@@ -1,5 +1,7 @@
 """测试 Toolify XML 解析器（已修复以适应新API）。"""
 
+import json
+
 import pytest
 from src.z2p_svc.services.toolify import parse_tool_calls_xml, convert_to_openai_tool_calls, get_toolify_core
 
@@ -158,4 +160,27 @@ class TestConvertToOpenAIToolCalls:
         result = convert_to_openai_tool_calls(parsed_tools)
         
         assert len(result) == 1
-        assert result[0]["function"]["arguments"] == "{}"
\ No newline at end of file
+        assert result[0]["function"]["arguments"] == "{}"
+
+    def test_convert_non_ascii_args(self):
+        """测试非 ASCII 参数按 UTF-8 原样输出，不转义。"""
+        parsed_tools = [
+            {"name": "get_weather", "args": {"location": "北京"}}
+        ]
+        
+        result = convert_to_openai_tool_calls(parsed_tools)
+        
+        assert result[0]["function"]["arguments"] == '{"location":"北京"}'
+        assert json.loads(result[0]["function"]["arguments"]) == {"location": "北京"}
+
+    def test_convert_args_unsupported_by_orjson(self):
+        """测试 orjson 无法序列化的参数（非字符串键、超大整数）回退到标准库 json。"""
+        parsed_tools = [
+            {"name": "big", "args": {"n": 2 ** 70}},
+            {"name": "int_key", "args": {1: "一"}},
+        ]
+
+        result = convert_to_openai_tool_calls(parsed_tools)
+
+        assert json.loads(result[0]["function"]["arguments"]) == {"n": 2 ** 70}
+        assert result[1]["function"]["arguments"] == '{"1": "一"}'